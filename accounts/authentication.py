@@ -0,0 +1,69 @@
+"""Module to authenticate API requests by token with cached users"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_cache_key(key):
+    """Return cache key of user authenticated by token key (raw keys are not stored)"""
+    return 'auth_token_' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def user_token_cache_key(user_id):
+    """Return cache key of the token_cache_key (not the token key) cached for user"""
+    return 'auth_user_' + str(user_id)
+
+
+def invalidate_token(key):
+    """Delete cached user of token key"""
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Delete cached token of user, so their next request reads the user again"""
+    cache_key = cache.get(user_token_cache_key(user_id))
+    if cache_key is not None:
+        cache.delete_many([cache_key, user_token_cache_key(user_id)])
+
+
+def token_user(key):
+    """
+    Return user of token key, from cache or reading token and user in one
+    query (active users are cached then). Return None for an unknown key.
+    """
+    cache_key = token_cache_key(key)
+    user = cache.get(cache_key)
+    if user is not None:
+        return user
+
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None:
+        return None
+
+    if token.user.is_active:
+        cache.set_many({cache_key: token.user, user_token_cache_key(token.user_id): cache_key},
+                       settings.AUTH_TOKEN_CACHE_TTL)
+    return token.user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication which caches the user of a token for
+    AUTH_TOKEN_CACHE_TTL seconds, so authenticated requests do not query
+    token and user tables. Cached users are deleted when their token is
+    deleted (logout) and whenever the user is saved or deleted.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return user, Token(key=key, user=user)
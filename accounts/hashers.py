@@ -0,0 +1,24 @@
+"""Module to define password hashers"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher with costs taken from settings (ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST in KiB and ARGON2_PARALLELISM). Hashes made with
+    other costs (or other hashers) are rehashed on the user's next login.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
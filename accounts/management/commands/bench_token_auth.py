@@ -0,0 +1,41 @@
+"""Benchmark token authentication with and without cached users"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from accounts.authentication import CachedTokenAuthentication, invalidate_user
+from utils.benchmark import rolled_back, create_bench_user, measure, summarize
+
+
+
+class Command(BaseCommand):
+    """
+    Authenticates requests of a throwaway user (rolled back afterwards)
+    with DRF TokenAuthentication and CachedTokenAuthentication, reporting
+    latency and queries per request.
+    """
+
+    help = 'Measure per request latency and queries of token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='authenticated requests')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = create_bench_user()
+            key = Token.objects.get(user=user).key
+            request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Token '+key)
+
+            for name, authentication in (('TokenAuthentication', TokenAuthentication()),
+                                         ('CachedTokenAuthentication',
+                                          CachedTokenAuthentication())):
+                with CaptureQueriesContext(connection) as queries:
+                    timings = measure(lambda: authentication.authenticate(request),
+                                      repeat=options['requests'])
+                self.stdout.write('{}: {:.2f} queries/request, {}'.format(
+                    name, len(queries) / options['requests'], summarize(timings)))
+
+            # rolling back deletes the token without signals
+            invalidate_user(user.pk)
@@ -0,0 +1,49 @@
+"""Benchmark email verification links"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.authentication import invalidate_user
+from utils.benchmark import rolled_back, create_bench_user, measure, summarize
+
+
+
+class Command(BaseCommand):
+    """
+    Opens verification links of throwaway users (rolled back afterwards),
+    reporting latency and queries of first verifications and of links
+    opened again (e.g. by mail scanners or double clicks).
+    """
+
+    help = 'Measure latency and queries per email verification'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='users verifying their email')
+
+    def verify(self, client, urls):
+        """Open every url once, return timings and number of queries"""
+        urls = iter(urls)
+        with CaptureQueriesContext(connection) as queries:
+            timings = measure(lambda: client.get(next(urls)), repeat=self.users)
+            count = len(queries)
+        return timings, count
+
+    def handle(self, *args, **options):
+        self.users = options['users']
+        client = APIClient()
+
+        with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+            users = [create_bench_user() for _ in range(self.users)]
+            urls = [reverse('verify-email', args=[key]) for key in
+                    Token.objects.filter(user__in=users).values_list('key', flat=True)]
+
+            for name in ('first verification', 'link opened again'):
+                timings, count = self.verify(client, urls)
+                self.stdout.write('{}: {:.2f} queries/request, {}'.format(
+                    name, count / self.users, summarize(timings)))
+
+            # rolling back deletes the users without signals
+            for user in users:
+                invalidate_user(user.pk)
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:14
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_alter_user_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='timezone',
+            field=models.CharField(db_index=True, default='UTC', max_length=63, validators=[accounts.models.validate_timezone]),
+        ),
+    ]
@@ -1,13 +1,16 @@
 """Module to create models for accounts"""
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 from django.urls import reverse
 from django_rest_passwordreset.signals import reset_password_token_created
-from django.core.mail import send_mail
+from outbox.mail import enqueue_mail
+from .authentication import invalidate_token, invalidate_user
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -16,7 +19,7 @@ class UserManager(BaseUserManager):
     """Class to manage user creation"""
 
 
-    def create_user(self, username, email, password=None):
+    def create_user(self, username, email, password=None, **extra_fields):
         """Creates local user"""
         if not email:
             raise ValueError('Users must have an email address')
@@ -25,7 +28,7 @@ class UserManager(BaseUserManager):
             raise ValueError('Users must have a username')
 
         email = self.normalize_email(email)
-        user = self.model(username=username, email=email)
+        user = self.model(username=username, email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
         return user
@@ -49,12 +52,24 @@ class UserManager(BaseUserManager):
 
 AUTH_PROVIDERS = {'google':'google', 'facebook':'facebook', 'email':'email'}
 
+
+def validate_timezone(value):
+    """Raise ValidationError if value is not an IANA time zone name"""
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError('Unknown time zone ' + str(value))
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """Model to define fields of user"""
     email = models.EmailField(max_length=255, unique=True, db_index=True)
     username = models.CharField(max_length=255, unique=True, db_index=True)
     email_verified = models.BooleanField(default=False)
     auth_provider = models.CharField(max_length=255, default=AUTH_PROVIDERS.get('email'))
+    # IANA time zone name, remainders are sent at the user's local midnight
+    timezone = models.CharField(max_length=63, default='UTC', db_index=True,
+                                validators=[validate_timezone])
     is_admin = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
@@ -87,6 +102,19 @@ def create_auth_token(instance=None, created=False, **kwargs):
 
 
 
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(instance, **kwargs):
+    """Delete cached user (e.g. deactivated) of user's token"""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    """Delete cached user of deleted token, so it cannot authenticate anymore"""
+    invalidate_token(instance.key)
+
+
+
 @receiver(reset_password_token_created)
 def password_reset_token_created(reset_password_token, *args, **kwargs):
     """Creates password reset token and send to user email to reset password"""
@@ -95,7 +123,7 @@ def password_reset_token_created(reset_password_token, *args, **kwargs):
         email_plaintext_message = "{}?token={}".format(reverse('password_reset:reset-password-request'),
                                                        reset_password_token.key)
 
-        send_mail(subject="Reset API Password",
+        enqueue_mail(subject="Reset API Password",
             message=email_plaintext_message,
             from_email=None,
             recipient_list=[reset_password_token.user.email])
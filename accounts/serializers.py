@@ -8,7 +8,7 @@ class UserSerializer(serializers.ModelSerializer):
     """Serialize user data"""
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'email_verified')
+        fields = ('id', 'username', 'email', 'email_verified', 'timezone')
 
 
 
@@ -17,7 +17,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'password']
+        fields = ['id', 'username', 'email', 'password', 'timezone']
         extra_kwargs = {'password': {'write_only': True}}
 
 
@@ -1,7 +1,15 @@
 """Module to define test cases for Accounts views"""
+from django.core import mail
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
 from rest_framework.authtoken.models import Token
+from outbox.mail import drain
+from outbox.models import OutboundEmail
 from utils.setup_test import TestSetUp
 from accounts.models import User
+from accounts.authentication import token_cache_key, user_token_cache_key
 
 
 
@@ -55,6 +63,32 @@ class TestRegisterView(TestSetUp):
         self.assertEqual(res.status_code, 201)
 
 
+    def test_register_with_timezone(self):
+        """Account is created with given time zone, UTC by default"""
+        self.user_register_data['timezone'] = 'Asia/Karachi'
+        res = self.client.post(self.register_url, self.user_register_data, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(User.objects.get(email=self.email).timezone, 'Asia/Karachi')
+
+
+    def test_register_with_invalid_timezone(self):
+        """Account cannot be created with unknown time zone"""
+        self.user_register_data['timezone'] = 'Mars/Olympus'
+        res = self.client.post(self.register_url, self.user_register_data, format="json")
+        self.assertEqual(res.status_code, 400)
+
+
+    def test_register_queues_verification_email(self):
+        """Verification email is queued in the outbox and sent by the worker"""
+        self.client.post(self.register_url, self.user_register_data, format="json")
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.get().recipient_list, [self.email])
+
+        drain()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('/accounts/verify-email/', mail.outbox[0].body)
+
+
     def test_register_with_existing_email(self):
         """Account cannot be created with existing email"""
         self.client.post(self.register_url, self.user_register_data, format="json")
@@ -81,6 +115,12 @@ class TestLoginView(TestSetUp):
         self.assertEqual(res.status_code, 400)
 
 
+    def test_login_with_json_array(self):
+        """Login data which is not an object is a validation error"""
+        res = self.client.post(self.login_url, [self.user_login_data], format="json")
+        self.assertEqual(res.status_code, 400)
+
+
     def test_login_without_email(self):
         """Account cannot be logged in without email"""
         self.create_test_user()
@@ -136,6 +176,65 @@ class TestLoginView(TestSetUp):
         self.assertEqual(res.status_code, 401)
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'login-tests'}},
+    LOGIN_FAILURES_PER_ACCOUNT=3, LOGIN_FAILURES_PER_IP=5)
+class TestLoginThrottle(TestSetUp):
+    """Test cases for failed login limits and password rehashing on login"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+        self.bad_login_data = dict(self.user_login_data, password='wrong password')
+
+
+    def test_account_throttled_after_failed_logins(self):
+        """Account is refused once it reaches its failed logins, even with right password"""
+        for _ in range(3):
+            res = self.client.post(self.login_url, self.bad_login_data, format="json")
+            self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(self.login_url, self.user_login_data, format="json")
+        self.assertEqual(res.status_code, 429)
+        self.assertIn('Retry-After', res)
+
+
+    def test_ip_throttled_after_failed_logins(self):
+        """Client IP is refused once it reaches its failed logins on any accounts"""
+        for number in range(5):
+            self.client.post(self.login_url, {'username': str(number)+'@example.com',
+                                              'password': 'password'}, format="json")
+
+        res = self.client.post(self.login_url, self.user_login_data, format="json")
+        self.assertEqual(res.status_code, 429)
+
+
+    def test_successful_login_clears_account_failures(self):
+        """Failed logins of account are forgotten after a successful login"""
+        for _ in range(2):
+            self.client.post(self.login_url, self.bad_login_data, format="json")
+        self.client.post(self.login_url, self.user_login_data, format="json")
+        for _ in range(2):
+            self.client.post(self.login_url, self.bad_login_data, format="json")
+
+        res = self.client.post(self.login_url, self.user_login_data, format="json")
+        self.assertEqual(res.status_code, 200)
+
+
+    def test_legacy_password_hash_upgraded_on_login(self):
+        """Password hashed with PBKDF2 is rehashed with argon2 on login"""
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password(self.email, hasher='pbkdf2_sha256'))
+
+        res = self.client.post(self.login_url, self.user_login_data, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+        self.assertTrue(self.user.check_password(self.email))
+
+
+
 class TestLogoutView(TestSetUp):
     """Test cases for account logout view"""
 
@@ -175,6 +274,65 @@ class TestLogoutView(TestSetUp):
 
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests'}})
+class TestCachedTokenAuthentication(TestSetUp):
+    """Test cases for token authentication with cached users"""
+
+    def setUp(self):
+        super().setUp()
+        self.header = self.login()
+
+
+    def auth_queries(self):
+        """Return status of an authenticated request and its queries on token or user tables"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.task_list_url, **self.header)
+        return res.status_code, [query for query in queries
+                                 if 'authtoken_token' in query['sql'] or
+                                 'accounts_user' in query['sql']]
+
+
+    def test_cached_user_skips_queries(self):
+        """Only the first request with a token queries token and user tables"""
+        first = self.auth_queries()
+        second = self.auth_queries()
+
+        self.assertEqual(first[0], 200)
+        self.assertTrue(first[1])
+        self.assertEqual(second, (200, []))
+
+
+    def test_raw_token_not_cached(self):
+        """Cache holds only the digest of the token, under the user and as key of the user"""
+        self.auth_queries()
+        key = self.header['HTTP_AUTHORIZATION'].split()[1]
+        cache_key = cache.get(user_token_cache_key(self.user.pk))
+
+        self.assertEqual(cache_key, token_cache_key(key))
+        self.assertNotIn(key, cache_key)
+
+
+    def test_logout_invalidates_cached_token(self):
+        """Token cannot authenticate once deleted by logout"""
+        self.auth_queries()
+        self.client.post(self.logout_url, **self.header)
+
+        res = self.client.get(self.task_list_url, **self.header)
+        self.assertEqual(res.status_code, 401)
+
+
+    def test_deactivated_user_rejected(self):
+        """Token of a deactivated user stops authenticating at once"""
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(self.task_list_url, **self.header)
+        self.assertEqual(res.status_code, 401)
+
+
+
 class TestResendLinkView(TestSetUp):
     """Test cases for resend verification link view"""
 
@@ -233,3 +391,24 @@ class TestVerifyEmail(TestSetUp):
         token, created = Token.objects.get_or_create(user=user)
         res = self.client.get('/accounts/verify-email/'+token.key+'/')
         self.assertEqual(res.status_code, 200)
+
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'verify-tests'}})
+    def test_verify_email_queries(self):
+        """Verification reads token and user in one query, repeated links use the cache"""
+        self.client.post(self.register_url, self.user_register_data, format="json")
+        token = Token.objects.get(user__email=self.user_register_data['email'])
+        url = '/accounts/verify-email/'+token.key+'/'
+
+        with CaptureQueriesContext(connection) as verify:
+            res = self.client.get(url)
+        # captured queries are read before the next request resets the query log
+        statements = [query['sql'].split()[0] for query in verify]
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as repeat:
+            again = self.client.get(url)
+
+        self.assertEqual((res.status_code, again.status_code), (201, 200))
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertEqual(len(repeat), 0)
@@ -0,0 +1,39 @@
+"""Module to limit failed logins per client IP and per account"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+def client_ip(request):
+    """Return IP of request's client (honoring NUM_PROXIES like DRF throttles)"""
+    return BaseThrottle().get_ident(request)
+
+
+def login_failure_keys(ip, username):
+    """Return cache keys counting failed logins of client ip and of username"""
+    account = hashlib.sha256(str(username).strip().lower().encode()).hexdigest()
+    return {'ip': 'login_failures_ip_' + ip, 'account': 'login_failures_account_' + account}
+
+
+def login_blocked(keys):
+    """Return True if IP or account of keys has too many recent failed logins"""
+    failures = cache.get_many(keys.values())
+    return (failures.get(keys['ip'], 0) >= settings.LOGIN_FAILURES_PER_IP or
+            failures.get(keys['account'], 0) >= settings.LOGIN_FAILURES_PER_ACCOUNT)
+
+
+def record_login_failure(keys):
+    """Count a failed login of IP and account for LOGIN_FAILURE_WINDOW seconds"""
+    for key in keys.values():
+        # the window starts with the first failure, incr keeps its expiry
+        cache.add(key, 0, settings.LOGIN_FAILURE_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, settings.LOGIN_FAILURE_WINDOW)
+
+
+def clear_login_failures(keys):
+    """Forget failed logins of account after a successful login"""
+    cache.delete(keys['account'])
@@ -1,17 +1,19 @@
 """Module to define views for accounts"""
-from django.conf import settings
 from django.contrib.auth import login, logout
-from django.core.cache import cache
-from django.core.mail import send_mail
+from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, Throttled, ValidationError
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.authentication import TokenAuthentication
 from .serializers import UserSerializer, RegisterSerializer, ResendLinkSerializer
+from .authentication import CachedTokenAuthentication, token_user
+from .throttling import (client_ip, login_failure_keys, login_blocked, record_login_failure,
+                         clear_login_failures)
+from api.report_cache import invalidate_reports
+from outbox.mail import enqueue_mail
 from .models import User
 
 
@@ -44,12 +46,10 @@ class RegisterAPI(generics.GenericAPIView):
 
             message_subject = 'Account verification'
 
-            if not settings.TESTING:
-                send_mail(subject=message_subject,
-                    message=message_content,
-                    from_email=None,
-                    recipient_list=[request.data['email']],
-                    fail_silently=False,)
+            enqueue_mail(subject=message_subject,
+                message=message_content,
+                from_email=None,
+                recipient_list=[request.data['email']])
 
             return Response({"success":"Verification link sent to your email."
                              " Please verify your account"}, status=status.HTTP_201_CREATED)
@@ -73,26 +73,20 @@ class VerifyEmail(generics.GenericAPIView):
     def get(self, request, token):
         """GET method to verify ownership of email of registered user"""
         try:
-            user_token = Token.objects.filter(key=token)
-            if not user_token.exists():
+            # token and user are read in one query, or taken from token cache
+            user = token_user(token)
+            if user is None:
                 return Response({'detail': 'Invalid token'}, status=status.HTTP_404_NOT_FOUND)
 
-            user_id = user_token[0].user.pk
-            user = User.objects.filter(id=user_id)
-
-            if user[0].email_verified:
+            if user.email_verified:
                 return Response({'Response' : 'Email already verified'}, status=status.HTTP_200_OK)
 
-            request.data['username'] = user[0].username
-            request.data['email'] = user[0].email
-            request.data['email_verified'] = True
-            serializer = UserSerializer(user[0], data=request.data)
-            serializer.is_valid(raise_exception=True)
-            user = serializer.save()
+            user.email_verified = True
+            user.save(update_fields=['email_verified', 'updated_at'])
 
             return Response({
                 "message": "Email verified successfully",
-                "user": serializer.data,
+                "user": UserSerializer(user).data,
                 "token": token}, status=status.HTTP_201_CREATED)
 
         except:
@@ -139,12 +133,10 @@ class ResendLink(generics.GenericAPIView):
 
             message_subject = "Account verification"
 
-            if not settings.TESTING:
-                send_mail(subject=message_subject,
-                    message=message_content,
-                    from_email=None,
-                    recipient_list=[request.data['email']],
-                    fail_silently=False,)
+            enqueue_mail(subject=message_subject,
+                message=message_content,
+                from_email=None,
+                recipient_list=[request.data['email']])
 
             return Response({'success':'verification link sent on email'},
                             status=status.HTTP_200_OK)
@@ -160,13 +152,26 @@ class LoginView(ObtainAuthToken):
     """
     An API view to login a user.
     Takes Email in username field and Password.
-    Returns Token, User_ID and Email.
+    Returns Token, User_ID and Email. Clients (and accounts) with
+    too many failed logins are refused for LOGIN_FAILURE_WINDOW seconds.
     """
 
     def post(self, request, *args, **kwargs):
         """POST method to validate login data and login user"""
+        # refuse bursts of bad logins before hashing their passwords
+        # (bodies which are not objects are rejected by the serializer)
+        username = request.data.get('username', '') if isinstance(request.data, dict) else ''
+        failure_keys = login_failure_keys(client_ip(request), username)
+        if login_blocked(failure_keys):
+            raise Throttled(wait=settings.LOGIN_FAILURE_WINDOW,
+                            detail='Too many failed logins, please try again later')
+
         serializer = self.serializer_class(data=request.data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            record_login_failure(failure_keys)
+            raise ValidationError(serializer.errors)
+
+        clear_login_failures(failure_keys)
         user = serializer.validated_data['user']
 
         if not user.email_verified:
@@ -191,30 +196,18 @@ class LogoutView(generics.GenericAPIView):
     """
     An API view to Logout a Logged In user.
     Takes Token in header for Authorization.
-    Clear user's cache and Logout that user.
+    Clear user's cache and Logout that user
+    (deleting the token also drops its cached user).
     """
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def post(self, request): # , format=None):
         """POST method to get user token, clear the cache and then logout user"""
 
         # delete user reports from cache before logging out
-        if cache.get(str(request.user.pk)+'_TotalTasks'):
-            cache.delete(str(request.user.pk)+'_TotalTasks')
-
-        if cache.get(str(request.user.pk)+'_AverageCompleted'):
-            cache.delete(str(request.user.pk)+'_AverageCompleted')
-
-        if cache.get(str(request.user.pk)+'_OverdueTasks'):
-            cache.delete(str(request.user.pk)+'_OverdueTasks')
-
-        if cache.get(str(request.user.pk)+'_MaxDate'):
-            cache.delete(str(request.user.pk)+'_MaxDate')
-
-        if cache.get(str(request.user.pk)+'_CountOpened'):
-            cache.delete(str(request.user.pk)+'_CountOpened')
+        invalidate_reports(request.user.pk)
 
         request._auth.delete()
         logout(request)
@@ -0,0 +1,122 @@
+"""Module to delete attachment files no task references"""
+import os
+import time
+from django.db import transaction
+from .models import Task, AttachmentBlob, AttachmentDeletion
+
+
+# number of queued deletions (or scanned files) handled per query
+CLEANUP_BATCH_SIZE = 1000
+
+ATTACHMENTS_DIR = 'attachments'
+
+
+def attachment_storage():
+    """Return storage of task attachments"""
+    return Task._meta.get_field('attachment').storage
+
+
+def referenced_names(names):
+    """Return names of given attachment files still referenced by a blob or a task"""
+    return (set(AttachmentBlob.objects.filter(name__in=names).values_list('name', flat=True))
+            | set(Task.objects.filter(attachment__in=names).values_list('attachment', flat=True)))
+
+
+def sweep_batch(batch_size=CLEANUP_BATCH_SIZE):
+    """
+    Delete files of one batch of queued deletions, skipping files which
+    were stored again meanwhile. Return number of processed and deleted.
+    """
+    storage = attachment_storage()
+    with transaction.atomic():
+        deletions = list(AttachmentDeletion.objects.select_for_update(skip_locked=True)
+                         .order_by('pk')[:batch_size])
+        if not deletions:
+            return 0, 0
+
+        names = {deletion.name for deletion in deletions}
+        # blobs stay locked until their files are deleted, so tasks cannot
+        # reference them again in between (acquire waits, then recreates them)
+        refcounts = dict(AttachmentBlob.objects.select_for_update().filter(name__in=names)
+                         .values_list('name', 'refcount'))
+        referenced = ({name for name, refcount in refcounts.items() if refcount > 0}
+                      | set(Task.objects.filter(attachment__in=names)
+                            .values_list('attachment', flat=True)))
+        unreferenced = names - referenced
+        for name in unreferenced:
+            storage.delete(name)
+        AttachmentBlob.objects.filter(name__in=unreferenced).delete()
+        AttachmentDeletion.objects.filter(pk__in=[deletion.pk for deletion in deletions]).delete()
+
+    return len(deletions), len(unreferenced)
+
+
+def sweep_deletions(batch_size=CLEANUP_BATCH_SIZE):
+    """Delete files of all queued deletions, return number of deleted files"""
+    started = time.perf_counter()
+    deleted = 0
+    while True:
+        processed, batch_deleted = sweep_batch(batch_size)
+        deleted += batch_deleted
+        if processed < batch_size:
+            break
+
+    if deleted:
+        print('attachments swept: {} file(s) deleted in {:.2f}s'.format(
+            deleted, time.perf_counter() - started))
+    return deleted
+
+
+def attachment_files(min_age=0):
+    """
+    Yield (name, size) of files under MEDIA_ROOT/attachments last modified
+    more than min_age seconds ago, walking directories one at a time.
+    """
+    storage = attachment_storage()
+    root = storage.path(ATTACHMENTS_DIR)
+    newest = time.time() - min_age
+
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime <= newest:
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                yield name, stat.st_size
+
+
+def collect_orphans(min_age=60*60, dry_run=False, batch_size=CLEANUP_BATCH_SIZE):
+    """
+    Delete files under MEDIA_ROOT/attachments referenced by no task or
+    blob (e.g. left by crashed uploads or earlier versions), checking
+    them against the database one batch at a time. Files newer than
+    min_age seconds are kept, they may belong to an upload in progress.
+    Return number of scanned files, orphans and orphan bytes.
+    """
+    storage = attachment_storage()
+    scanned = orphans = orphan_bytes = 0
+
+    def check(batch):
+        nonlocal orphans, orphan_bytes
+        referenced = referenced_names(list(batch))
+        for name, size in batch.items():
+            if name not in referenced:
+                orphans += 1
+                orphan_bytes += size
+                if not dry_run:
+                    storage.delete(name)
+
+    batch = {}
+    for name, size in attachment_files(min_age):
+        scanned += 1
+        batch[name] = size
+        if len(batch) >= batch_size:
+            check(batch)
+            batch = {}
+    if batch:
+        check(batch)
+
+    return scanned, orphans, orphan_bytes
@@ -1,44 +1,237 @@
 """Define cron jobs(Scheduled jobs)"""
-from datetime import datetime
-from django.core.mail import send_mail
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time, timedelta, timezone
+from itertools import groupby
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Mod
 from accounts.models import User
-from .models import Task
+from outbox.mail import enqueue_messages
+from .models import Task, ReminderCheckpoint
 
 
+REMAINDER_SUBJECT = "[Remainder] Tasks Due Today"
+
+# number of remainders queued in one insert
+REMAINDER_BATCH_SIZE = 500
+
+
+def day_range(run_date, zone=timezone.utc):
+    """Return [start, end) datetimes of run_date in time zone (UTC by default)"""
+    return (datetime.combine(run_date, dt_time.min, tzinfo=zone),
+            datetime.combine(run_date + timedelta(days=1), dt_time.min, tzinfo=zone))
+
+
+def midnight_zones(now):
+    """
+    Return (time zone name, local date) of users' time zones in which a
+    new day started during the hour before now.
+    """
+    zones = []
+    for zone_name in User.objects.order_by().values_list('timezone', flat=True).distinct():
+        try:
+            zone = ZoneInfo(zone_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            print('skipping unknown time zone ' + str(zone_name))
+            continue
+
+        local_date = now.astimezone(zone).date()
+        if (now - timedelta(hours=1)).astimezone(zone).date() != local_date:
+            zones.append((zone_name, local_date))
+    return zones
+
+
+def due_tasks(start, end, shard=0, shard_count=1, after_user_id=0, zone_name=''):
+    """
+    Return tasks due in [start, end) with their users, in one query
+    streamed in chunks and ordered by user so they can be grouped.
+    Only users in shard (user id modulo shard_count) with id greater
+    than after_user_id, and in time zone zone_name if given, are included.
+    """
+    tasks = Task.objects.filter(dueDate__gte=start, dueDate__lt=end)
+    if zone_name:
+        tasks = tasks.filter(user__timezone=zone_name)
+    if shard_count > 1:
+        tasks = tasks.annotate(shard=Mod('user_id', shard_count)).filter(shard=shard)
+    if after_user_id:
+        tasks = tasks.filter(user_id__gt=after_user_id)
+
+    return (tasks.select_related('user')
+            .only('title', 'dueDate', 'completionStatus', 'user__username', 'user__email')
+            .order_by('user_id', 'completionStatus', 'dueDate')
+            .iterator(chunk_size=2000))
+
+
+def remainder_message(user, tasks):
+    """Return remainder email listing user's tasks due today"""
+    tasks_detail = [{'Title': task.title, 'Due': str(task.dueDate)} for task in tasks]
+
+    message_content = ("Hello " + user.username + "\n\nYou have task(s) due today. "
+                        "List of task(s) is appended below\n\n" + str(tasks_detail))
+
+    return EmailMessage(subject=REMAINDER_SUBJECT, body=message_content,
+                        from_email=None, to=[user.email])
+
+
+def queue_batches(tasks, on_batch=None):
+    """
+    Queue remainders for tasks (ordered by user) in the outbox, one insert
+    per batch. on_batch(last_user_id, users, queued) is called after each
+    batch in the same transaction, so progress is saved together with
+    the queued emails. Return number of users, tasks and queued emails.
+    """
+    users = tasks_count = queued = 0
+    batch = []
+
+    def flush():
+        if on_batch is None:
+            return enqueue_messages(batch)
+        with transaction.atomic():
+            batch_queued = enqueue_messages(batch)
+            on_batch(batch_user_id, len(batch), batch_queued)
+        return batch_queued
+
+    for batch_user_id, user_tasks in groupby(tasks, key=lambda task: task.user_id):
+        user_tasks = list(user_tasks)
+        users += 1
+        tasks_count += len(user_tasks)
+        batch.append(remainder_message(user_tasks[0].user, user_tasks))
+
+        if len(batch) >= REMAINDER_BATCH_SIZE:
+            queued += flush()
+            batch = []
+
+    if batch:
+        queued += flush()
+
+    return users, tasks_count, queued
+
+
+def print_metrics(name, users, tasks_count, queued, elapsed):
+    """Print queued count and throughput of a remainder run"""
+    print('{}: {} email(s) queued for {} task(s) of {} user(s) in {:.2f}s ({:.1f} users/s)'
+          .format(name, queued, tasks_count, users, elapsed, users / elapsed if elapsed else 0))
+
 
 def send_remainders():
-    """Send mail remainders to users for tasks due today"""
+    """Queue mail remainders to users for tasks due today"""
 
     print('running cronjob')
+    started = time.perf_counter()
 
-    # get all the users
-    users = User.objects.all()
-    date_today = datetime.utcnow().date()
+    start, end = day_range(datetime.utcnow().date())
+    users, tasks_count, queued = queue_batches(due_tasks(start, end))
 
-    # for each user fetch all the tasks
-    for user in users:
-        tasks = Task.objects.all().filter(user_id = user.pk)
-        if len(tasks)==0:
-            continue
+    print_metrics('remainders', users, tasks_count, queued, time.perf_counter() - started)
 
-        tasks_detail = []
 
-        # for each task see if it's due today or not
-        for task in tasks:
-            if task.dueDate.date() == date_today:
-                tasks_detail.append({'Title': task.title, 'Due': str(task.dueDate)})
+def send_remainders_shard(shard, shard_count, run_date=None, zone_name=''):
+    """
+    Queue remainders of one shard of users for tasks due on run_date
+    (today by default), resuming after the checkpoint of an earlier
+    run of the same shard. The checkpoint is advanced in the transaction
+    queueing each batch, so a crashed run never queues a user twice.
+    With zone_name only users of that time zone are included and the
+    day is their local day. Return dict of shard metrics.
+    """
+    zone = ZoneInfo(zone_name) if zone_name else timezone.utc
+    run_date = run_date or datetime.now(zone).date()
+    started = time.perf_counter()
 
-        # if there is no task due today then continue to next user
-        if len(tasks_detail)==0:
-            continue
+    checkpoint, _ = ReminderCheckpoint.objects.get_or_create(
+        run_date=run_date, timezone=zone_name, shard=shard, shard_count=shard_count)
+    metrics = {'shard': shard, 'timezone': zone_name, 'users': 0, 'tasks': 0, 'queued': 0,
+               'seconds': 0.0, 'resumed_after': checkpoint.last_user_id,
+               'skipped': checkpoint.finished}
+
+    if not checkpoint.finished:
+        def save_progress(last_user_id, users, queued):
+            ReminderCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                last_user_id=last_user_id, users=F('users') + users, queued=F('queued') + queued)
+
+        start, end = day_range(run_date, zone)
+        tasks = due_tasks(start, end, shard, shard_count, checkpoint.last_user_id, zone_name)
+        metrics['users'], metrics['tasks'], metrics['queued'] = queue_batches(tasks, save_progress)
+        ReminderCheckpoint.objects.filter(pk=checkpoint.pk).update(finished=True)
+
+    metrics['seconds'] = time.perf_counter() - started
+    print_metrics('shard {}/{}{}'.format(shard, shard_count, ' ' + zone_name if zone_name else ''),
+                  metrics['users'], metrics['tasks'], metrics['queued'], metrics['seconds'])
+    return metrics
+
+
+def _init_worker():
+    """Set up django in pool workers started without fork"""
+    if not apps.ready:
+        django.setup()
+
+
+def _run_shard(arguments):
+    """Run one shard in a pool worker"""
+    return send_remainders_shard(*arguments)
+
+
+def run_shards(shards, processes, started):
+    """
+    Run send_remainders_shard for every (shard, shard_count, run_date,
+    zone_name) in shards on a pool of processes, print totals and
+    return list of shard metrics.
+    """
+    processes = min(processes or settings.REMAINDER_PROCESSES, len(shards))
+    if processes > 1:
+        # workers must open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+            results = list(pool.map(_run_shard, shards))
+    else:
+        results = [_run_shard(shard) for shard in shards]
+
+    print_metrics('remainders', sum(result['users'] for result in results),
+                  sum(result['tasks'] for result in results),
+                  sum(result['queued'] for result in results), time.perf_counter() - started)
+    return results
+
+
+def send_sharded_remainders(shard_count=None, processes=None, run_date=None):
+    """
+    Queue mail remainders to all users for tasks due today (UTC),
+    splitting users into shard_count shards queued by a pool of
+    processes. Finished shards of the day are skipped, so rerunning
+    after a crash resumes the run. Return list of shard metrics.
+    """
+    shard_count = shard_count or settings.REMAINDER_SHARDS
+    run_date = run_date or datetime.utcnow().date()
+
+    print('running cronjob: {} shard(s)'.format(shard_count))
+    started = time.perf_counter()
+
+    return run_shards([(shard, shard_count, run_date) for shard in range(shard_count)],
+                      processes, started)
+
+
+def send_hourly_remainders(now=None, shard_count=None, processes=None):
+    """
+    Queue mail remainders to users whose local day started during the
+    last hour, for tasks due on their local day. Run hourly, this spreads
+    remainders over the day by time zone instead of sending all of them
+    at midnight UTC. Return list of shard metrics.
+    """
+    now = now or datetime.now(timezone.utc)
+    shard_count = shard_count or settings.REMAINDER_SHARDS
 
-        # sending remainder of tasks due today to user through email
-        message_content = ("Hello " + user.username + "\n\nYou have task(s) due today. "
-                            "List of task(s) is appended below\n\n" + str(tasks_detail))
-        message_subject = "[Remainder] Tasks Due Today"
+    started = time.perf_counter()
+    zones = midnight_zones(now)
+    print('running cronjob: {} time zone(s) at local midnight, {} shard(s) each'.format(
+        len(zones), shard_count))
+    if not zones:
+        return []
 
-        send_mail(subject=message_subject,
-            message=message_content,
-            from_email=None,
-            recipient_list=[user.email],
-            fail_silently=False,)
+    return run_shards([(shard, shard_count, local_date, zone_name)
+                       for zone_name, local_date in zones for shard in range(shard_count)],
+                      processes, started)
@@ -0,0 +1,142 @@
+"""Module to serve task attachments with range and conditional requests"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Return inclusive (start, end) byte range requested by Range header of a
+    file of size bytes. Return None to send the whole file (no header, an
+    unknown unit or several ranges) and raise ValueError for a range
+    which cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # suffix range: the last bytes of the file
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+class RangeFile:
+    """File like object reading only [start, end] of an open file"""
+
+    def __init__(self, file, start, end):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        """Read up to size bytes, never past end of range"""
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        """Close underlying file"""
+        self.file.close()
+
+
+def content_disposition(filename):
+    """
+    Return attachment Content-Disposition header of filename: quoted with
+    backslash escapes when it is printable ASCII, else percent encoded UTF-8
+    (so quotes, semicolons or line breaks of a title cannot alter the header).
+    """
+    if filename.isascii() and filename.isprintable():
+        return 'attachment; filename="{}"'.format(
+            filename.replace('\\', '\\\\').replace('"', '\\"'))
+    return "attachment; filename*=utf-8''{}".format(quote(filename))
+
+
+def attachment_etag(task):
+    """Return quoted ETag of task's attachment (its sha256 when known)"""
+    return quote_etag(task.attachment_hash or
+                      hashlib.sha256(task.attachment.name.encode()).hexdigest())
+
+
+def attachment_response(request, task, filename):
+    """
+    Return response sending task's attachment as filename, answering
+    If-None-Match with 304 and a single byte Range with 206. The file is
+    streamed from storage (sendfile when the server supports it), or handed
+    to the web server with X-Accel-Redirect when ATTACHMENT_ACCEL_REDIRECT
+    is set.
+    """
+    etag = attachment_etag(task)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    content_type = mimetypes.guess_type(task.attachment.name)[0] or 'application/octet-stream'
+
+    if settings.ATTACHMENT_ACCEL_REDIRECT:
+        # the web server sends the file itself (and handles Range)
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.ATTACHMENT_ACCEL_REDIRECT + task.attachment.name
+        response['Content-Disposition'] = content_disposition(filename)
+        response['ETag'] = etag
+        return response
+
+    storage = task.attachment.storage
+    size = storage.size(task.attachment.name)
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            return response
+
+    attachment = storage.open(task.attachment.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(attachment, as_attachment=True, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(attachment, start, end), as_attachment=True,
+                                content_type=content_type, status=206)
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, size)
+        response['Content-Length'] = end - start + 1
+
+    # set here rather than by FileResponse, which does not escape filename
+    response['Content-Disposition'] = content_disposition(filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+def attachment_filename(task):
+    """Return download filename of task's attachment: its title with the file's extension"""
+    _, extension = os.path.splitext(task.attachment.name)
+    return task.title + extension
@@ -0,0 +1,68 @@
+"""Benchmark importing many tasks one request at a time against one bulk request"""
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Task
+from utils.benchmark import rolled_back, create_bench_user, measure
+
+
+
+class Command(BaseCommand):
+    """
+    Imports the same tasks for two throwaway users (rolled back afterwards):
+    with one task-create request per task and with a single tasks/bulk/
+    request, reporting time and number of queries of both.
+    """
+
+    help = 'Measure importing tasks with task-create requests against one bulk request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='tasks imported per user')
+
+    def tasks(self, count):
+        """Return JSON data of count tasks"""
+        return [{'title': 'imported task '+str(number), 'description': 'task '+str(number),
+                 'dueDate': '2021-08-08T12:23:28Z', 'completionStatus': number % 2 == 0}
+                for number in range(count)]
+
+    def report(self, name, user, timings, queries):
+        """Print timing and query count of an import"""
+        self.stdout.write('{}: {} tasks created in {:.1f} ms with {} queries on {}'.format(
+            name, Task.objects.filter(user=user).count(), timings[0], len(queries),
+            connection.vendor))
+
+    def handle(self, *args, **options):
+        tasks = self.tasks(options['tasks'])
+        client = APIClient()
+
+        with tempfile.TemporaryDirectory() as media_root, \
+             override_settings(ALLOWED_HOSTS=['testserver'], MEDIA_ROOT=media_root,
+                               MAX_TASKS_PER_USER=options['tasks']), \
+             rolled_back():
+
+            user = create_bench_user()
+            client.force_authenticate(user)
+
+            def one_by_one():
+                for task in tasks:
+                    # task-create takes multipart data with an attachment
+                    data = dict(task, attachment=SimpleUploadedFile('task.txt', b'task'))
+                    client.post(reverse('task-create'), data)
+
+            with CaptureQueriesContext(connection) as queries:
+                timings = measure(one_by_one)
+            self.report('task-create per task', user, timings, queries)
+
+            user = create_bench_user()
+            client.force_authenticate(user)
+
+            def bulk():
+                client.post(reverse('task-bulk'), tasks, format='json')
+
+            with CaptureQueriesContext(connection) as queries:
+                timings = measure(bulk)
+            self.report('tasks/bulk/', user, timings, queries)
@@ -0,0 +1,60 @@
+"""Benchmark the daily remainder job"""
+import uuid
+from datetime import datetime, timezone
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from accounts.models import User
+from api.models import Task
+from api.cron import send_remainders
+from outbox.mail import drain
+from utils.benchmark import rolled_back, measure, summarize
+
+
+
+def legacy_send_remainders():
+    """Remainders sent as before: one task query and one SMTP send per user"""
+    date_today = datetime.utcnow().date()
+    for user in User.objects.all():
+        tasks_detail = [{'Title': task.title, 'Due': str(task.dueDate)}
+                        for task in Task.objects.all().filter(user_id=user.pk)
+                        if task.dueDate.date() == date_today]
+        if tasks_detail:
+            send_mail(subject="[Remainder] Tasks Due Today", message=str(tasks_detail),
+                      from_email=None, recipient_list=[user.email])
+
+
+
+class Command(BaseCommand):
+    """
+    Creates users with tasks due today (rolled back afterwards) and times
+    the remainder job against the per user implementation, then the
+    outbox worker sending the queued remainders, delivering to the
+    in-memory email backend.
+    """
+
+    help = 'Time the daily remainder job for many users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='number of users')
+        parser.add_argument('--skip-legacy', action='store_true',
+                            help='do not time the per user implementation')
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            prefix = uuid.uuid4().hex[:8]
+            User.objects.bulk_create(
+                [User(username=prefix+str(i), email=prefix+str(i)+'@benchmark.local')
+                 for i in range(options['users'])], batch_size=1000)
+
+            due_date = datetime.now(timezone.utc)
+            users = User.objects.filter(username__startswith=prefix).values_list('pk', flat=True)
+            Task.objects.bulk_create([Task(user_id=user_id, title='task', dueDate=due_date)
+                                      for user_id in users.iterator()], batch_size=1000)
+
+            self.stdout.write('{} users'.format(options['users']))
+            if not options['skip_legacy']:
+                self.stdout.write('  per user:  ' + summarize(measure(legacy_send_remainders)))
+            self.stdout.write('  queued:    ' + summarize(measure(send_remainders)))
+            self.stdout.write('  drained:   ' + summarize(measure(drain)))
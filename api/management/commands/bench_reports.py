@@ -0,0 +1,87 @@
+"""Benchmark report generation by fetching rows vs maintained task stats"""
+import random
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from api.models import Task, UserTaskStats
+from api import reports
+from utils.benchmark import rolled_back, create_bench_user, measure, summarize
+
+
+
+def legacy_reports(user, now):
+    """Reports computed the way report views did before, by looping over rows"""
+    queryset = Task.objects.all().filter(user_id=user.pk)
+    total = len(queryset)
+    completed = len(queryset.filter(completionStatus=True))
+
+    overdue = 0
+    for query in queryset:
+        if query.completionStatus:
+            if query.completionDate > query.dueDate:
+                overdue += 1
+        elif now > query.dueDate:
+            overdue += 1
+
+    completion_dates = {}
+    for query in Task.objects.all().filter(user_id=user.pk, completionStatus=True):
+        date = str(query.completionDate.date())
+        completion_dates[date] = completion_dates.get(date, 0) + 1
+
+    max_tasks, max_date = 0, None
+    for date, completed_tasks in completion_dates.items():
+        if completed_tasks > max_tasks:
+            max_tasks, max_date = completed_tasks, date
+
+    opened_dates = {}
+    for query in queryset:
+        weekday = reports.WEEKDAYS[query.creationDate.weekday()]
+        opened_dates[weekday] = opened_dates.get(weekday, 0) + 1
+
+    return total, completed, overdue, max_date, max_tasks, opened_dates
+
+
+def stats_reports(user, now):
+    """Reports computed by the reports module from maintained stats"""
+    counts = reports.task_counts(user.pk, now)
+    return (reports.total_tasks(user, counts), reports.overdue_tasks(user, counts),
+            reports.max_date(user), reports.count_opened(user, counts))
+
+
+
+class Command(BaseCommand):
+    """
+    Creates a throwaway user per size (rolled back afterwards) and
+    times all reports computed from fetched rows and from task stats.
+    """
+
+    help = 'Compare row-fetching and stats based report cost for growing task lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='number of tasks for each run')
+        parser.add_argument('--repeat', type=int, default=3, help='timed runs per size')
+
+    def handle(self, *args, **options):
+        now = datetime.now(timezone.utc)
+
+        for size in options['sizes']:
+            with rolled_back():
+                user = create_bench_user()
+                tasks = []
+                for i in range(size):
+                    due_date = now + timedelta(days=random.randint(-60, 60))
+                    completed = random.random() < 0.5
+                    completion_date = due_date + timedelta(days=random.randint(-5, 5))
+                    tasks.append(Task(user=user, title='task '+str(i), dueDate=due_date,
+                                      completionStatus=completed,
+                                      completionDate=completion_date if completed else None))
+                Task.objects.bulk_create(tasks, batch_size=1000)
+                # bulk_create skips the signals maintaining stats
+                UserTaskStats.objects.rebuild(user.pk)
+
+                legacy = measure(lambda: legacy_reports(user, now), repeat=options['repeat'])
+                stats = measure(lambda: stats_reports(user, now), repeat=options['repeat'])
+
+                self.stdout.write('{} tasks'.format(size))
+                self.stdout.write('  row fetching: ' + summarize(legacy))
+                self.stdout.write('  stats:        ' + summarize(stats))
@@ -0,0 +1,66 @@
+"""Benchmark similar task detection over synthetic Faker titles"""
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand
+from faker import Faker
+from api.models import Task, SimilarTaskPair
+from api.similarity import SIMILARITY_MODES, similar_pairs, is_similar
+from utils.benchmark import rolled_back, create_bench_user, measure, summarize
+
+
+
+def nested_loop_pairs(titles):
+    """Similar tasks found by comparing every pair of titles"""
+    return [[title, other_title] for index, title in enumerate(titles)
+            for other_title in titles[index+1:] if is_similar(title, other_title)]
+
+
+
+class Command(BaseCommand):
+    """
+    Generates task titles with Faker and times every similarity mode in
+    memory, then the persisted index (rolled back afterwards): a full
+    rebuild, indexing one new task and reading precomputed pairs.
+    """
+
+    help = 'Compare similar task detection modes and the persisted pair index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000, help='number of task titles')
+        parser.add_argument('--words', type=int, default=3, help='words per generated title')
+        parser.add_argument('--nested-loop', action='store_true',
+                            help='also time comparing every pair of titles (slow)')
+
+    def handle(self, *args, **options):
+        fake = Faker()
+        Faker.seed(0)
+        titles = set()
+        while len(titles) < options['tasks']:
+            titles.add(fake.sentence(nb_words=options['words'],
+                                     variable_nb_words=True)[:-1].lower()[:50])
+        titles = list(titles)
+
+        self.stdout.write('{} titles'.format(len(titles)))
+        if options['nested_loop']:
+            timings = measure(lambda: nested_loop_pairs(titles))
+            self.stdout.write('  nested loop: ' + summarize(timings))
+
+        for mode in SIMILARITY_MODES:
+            pairs = []
+            timings = measure(lambda: pairs.extend(similar_pairs(titles, mode)))
+            self.stdout.write('  {}: {} pairs, {}'.format(mode, len(pairs), summarize(timings)))
+
+        with rolled_back():
+            user = create_bench_user()
+            due_date = datetime.now(timezone.utc)
+            Task.objects.bulk_create([Task(user=user, title=title, dueDate=due_date)
+                                      for title in titles[1:]], batch_size=1000)
+
+            timings = measure(lambda: SimilarTaskPair.objects.rebuild(user.pk))
+            self.stdout.write('  persisted rebuild: ' + summarize(timings))
+
+            timings = measure(lambda: Task.objects.create(user=user, title=titles[0],
+                                                          dueDate=due_date))
+            self.stdout.write('  create one indexed task: ' + summarize(timings))
+
+            timings = measure(lambda: SimilarTaskPair.objects.pairs_for_user(user.pk), repeat=5)
+            self.stdout.write('  read precomputed pairs: ' + summarize(timings))
@@ -0,0 +1,43 @@
+"""Benchmark task lookup by (user, title) on a large todo list"""
+import random
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.models import Task
+from utils.benchmark import rolled_back, create_bench_user, measure, summarize
+
+
+
+class Command(BaseCommand):
+    """
+    Creates a throwaway user with many tasks (rolled back afterwards)
+    and measures the title lookup used by task detail/update/delete views.
+    """
+
+    help = 'Measure Task lookup latency by (user, title) for a user with many tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='tasks created for the user')
+        parser.add_argument('--lookups', type=int, default=500, help='number of timed lookups')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = create_bench_user()
+            due_date = datetime.now(timezone.utc) + timedelta(days=1)
+            Task.objects.bulk_create(
+                [Task(user=user, title='task '+str(i), dueDate=due_date)
+                 for i in range(options['tasks'])],
+                batch_size=1000)
+
+            titles = ['task '+str(random.randrange(options['tasks']))
+                      for _ in range(options['lookups'])]
+            titles = iter(titles)
+
+            def lookup():
+                Task.objects.filter(user_id=user.pk).get(title=next(titles))
+
+            timings = measure(lookup, repeat=options['lookups'])
+            self.stdout.write('{} tasks, {} lookups on {}: {}'.format(
+                options['tasks'], options['lookups'], connection.vendor, summarize(timings)))
+            self.stdout.write('query plan:\n' +
+                              Task.objects.filter(user_id=user.pk, title='task 0').explain())
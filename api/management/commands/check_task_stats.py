@@ -0,0 +1,42 @@
+"""Check per user task stats against the task table"""
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from api.models import UserTaskStats
+
+
+
+class Command(BaseCommand):
+    """
+    Compares stored UserTaskStats of every user with stats computed from
+    the task table, reports mismatches and optionally rebuilds them.
+    """
+
+    help = 'Report users whose stored task stats differ from their tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='only check these users')
+        parser.add_argument('--fix', action='store_true', help='rebuild inconsistent stats')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        checked = inconsistent = 0
+        for user_id in users.iterator():
+            checked += 1
+            differences = UserTaskStats.objects.differences(user_id)
+            if not differences:
+                continue
+
+            inconsistent += 1
+            for field, (stored, actual) in differences.items():
+                self.stdout.write('user {}: {} is {}, expected {}'.format(
+                    user_id, field, stored, actual))
+
+            if options['fix']:
+                UserTaskStats.objects.rebuild(user_id)
+
+        self.stdout.write('checked {} user(s), {} inconsistent'.format(checked, inconsistent))
+        if inconsistent and not options['fix']:
+            raise CommandError('task stats are inconsistent, run with --fix to rebuild them')
@@ -0,0 +1,44 @@
+"""Move attachments stored before content addressing into shared blobs"""
+import os
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.models import Task, AttachmentBlob
+
+
+
+class Command(BaseCommand):
+    """
+    Re-saves attachments stored under attachments/<user>/<title>-<filename>
+    as content addressed blobs, so identical files are kept once. Old
+    files are queued for deletion once their task references the blob.
+    """
+
+    help = 'Move legacy attachments into content addressed blobs'
+
+    def handle(self, *args, **options):
+        storage = Task._meta.get_field('attachment').storage
+        tasks = (Task.objects.exclude(attachment='').exclude(attachment__isnull=True)
+                 .exclude(attachment__startswith='attachments/blobs/').order_by('pk'))
+
+        moved = missing = moved_bytes = 0
+        blobs = set()
+        for task in tasks.iterator():
+            old_name = task.attachment.name
+            if not storage.exists(old_name):
+                missing += 1
+                continue
+
+            with transaction.atomic(), storage.open(old_name, 'rb') as old_file:
+                task.attachment.save(os.path.basename(old_name), File(old_file), save=False)
+                task.save(update_fields=['attachment', 'attachment_hash', 'attachment_size'])
+
+            moved += 1
+            moved_bytes += task.attachment_size
+            blobs.add(task.attachment.name)
+
+        stored_bytes = sum(AttachmentBlob.objects.filter(name__in=blobs)
+                           .values_list('size', flat=True))
+        self.stdout.write('moved {} attachment(s) ({} bytes) into {} blob(s) ({} bytes), '
+                          '{} missing file(s) skipped'.format(moved, moved_bytes, len(blobs),
+                                                              stored_bytes, missing))
@@ -0,0 +1,26 @@
+"""Delete attachment files no task references"""
+from django.core.management.base import BaseCommand
+from api.cleanup import collect_orphans, CLEANUP_BATCH_SIZE
+
+
+
+class Command(BaseCommand):
+    """
+    Walks MEDIA_ROOT/attachments and deletes files referenced by no task
+    or attachment blob, checking files against the database in batches.
+    """
+
+    help = 'Delete orphan attachment files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=60*60,
+                            help='keep files modified in the last seconds (uploads in progress)')
+        parser.add_argument('--dry-run', action='store_true', help='only report orphans')
+        parser.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE,
+                            help='files checked per query')
+
+    def handle(self, *args, **options):
+        scanned, orphans, orphan_bytes = collect_orphans(options['min_age'], options['dry_run'],
+                                                         options['batch_size'])
+        self.stdout.write('scanned {} file(s), {} {} orphan file(s) ({} bytes)'.format(
+            scanned, 'found' if options['dry_run'] else 'deleted', orphans, orphan_bytes))
@@ -0,0 +1,30 @@
+"""Rebuild word index and similar task pairs from the task table"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.models import Task, SimilarTaskPair
+
+
+
+class Command(BaseCommand):
+    """
+    Recomputes TaskToken and SimilarTaskPair rows of users, e.g. after
+    changing SIMILAR_TASKS_MODE or its options.
+    """
+
+    help = 'Rebuild similar task pairs of all users (or of the given user ids)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='only rebuild these users')
+
+    def handle(self, *args, **options):
+        users = Task.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        if options['user_ids']:
+            users = options['user_ids']
+
+        rebuilt = 0
+        for user_id in users:
+            SimilarTaskPair.objects.rebuild(user_id)
+            rebuilt += 1
+
+        self.stdout.write('rebuilt {} similar task pairs of {} user(s)'.format(
+            settings.SIMILAR_TASKS_MODE, rebuilt))
@@ -0,0 +1,26 @@
+"""Rebuild per user task stats from the task table"""
+from django.core.management.base import BaseCommand
+from accounts.models import User
+from api.models import UserTaskStats
+
+
+
+class Command(BaseCommand):
+    """Recomputes UserTaskStats and UserCompletionDay rows of users from scratch."""
+
+    help = 'Rebuild task stats of all users (or of the given user ids) from the task table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='only rebuild these users')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        rebuilt = 0
+        for user_id in users.iterator():
+            UserTaskStats.objects.rebuild(user_id)
+            rebuilt += 1
+
+        self.stdout.write('rebuilt task stats of {} user(s)'.format(rebuilt))
@@ -0,0 +1,46 @@
+"""Queue daily remainders, sharded across processes or workers"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from api.cron import send_remainders_shard, send_sharded_remainders, send_hourly_remainders
+
+
+
+class Command(BaseCommand):
+    """
+    Queues remainders for tasks due today in the outbox. Without --shard
+    every shard is queued by a local process pool; with --shard only that
+    shard is queued, so shards can be spread over several workers.
+    With --hourly only users whose local day started during the last hour
+    are included, as in the hourly cron job. Progress is kept per shard
+    and day, so rerunning after a crash resumes where it stopped.
+    """
+
+    help = 'Queue remainders for tasks due today'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', type=int, help='number of shards (REMAINDER_SHARDS)')
+        parser.add_argument('--processes', type=int, help='pool size (REMAINDER_PROCESSES)')
+        parser.add_argument('--shard', type=int, help='only queue this shard')
+        parser.add_argument('--hourly', action='store_true',
+                            help='only users whose local day started in the last hour')
+        parser.add_argument('--date', type=date.fromisoformat,
+                            help='run date YYYY-MM-DD (today, UTC)')
+
+    def handle(self, *args, **options):
+        if options['hourly']:
+            results = send_hourly_remainders(shard_count=options['shards'],
+                                             processes=options['processes'])
+        elif options['shard'] is not None:
+            if not options['shards'] or not 0 <= options['shard'] < options['shards']:
+                raise CommandError('--shard needs --shards greater than the shard')
+            results = [send_remainders_shard(options['shard'], options['shards'], options['date'])]
+        else:
+            results = send_sharded_remainders(options['shards'], options['processes'],
+                                              options['date'])
+
+        for result in results:
+            self.stdout.write('shard {shard}{zone}: {queued} queued for {users} user(s) in '
+                              '{seconds:.2f}s{status}'.format(
+                                  zone=' ' + result['timezone'] if result['timezone'] else '',
+                                  status=' (already finished)' if result['skipped'] else '',
+                                  **result))
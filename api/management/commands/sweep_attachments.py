@@ -0,0 +1,28 @@
+"""Delete attachment files queued for deletion"""
+import time
+from django.core.management.base import BaseCommand
+from api.cleanup import sweep_deletions, CLEANUP_BATCH_SIZE
+
+
+
+class Command(BaseCommand):
+    """
+    Deletes files of tasks' released attachments, queued as
+    AttachmentDeletion rows. Runs until stopped, or once with --once.
+    """
+
+    help = 'Delete attachment files queued for deletion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='sweep once and exit')
+        parser.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE,
+                            help='deletions handled per query')
+        parser.add_argument('--sleep', type=float, default=10.0,
+                            help='seconds to wait between sweeps')
+
+    def handle(self, *args, **options):
+        while True:
+            sweep_deletions(options['batch_size'])
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
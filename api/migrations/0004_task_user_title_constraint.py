@@ -0,0 +1,21 @@
+# Generated by Django 3.2.5 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_rename_attachement_task_attachment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'completionStatus', 'dueDate'], name='task_user_status_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='unique_task_title_per_user'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.2.5 on 2026-10-18 13:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+WEEKDAY_FIELDS = ['opened_monday', 'opened_tuesday', 'opened_wednesday', 'opened_thursday',
+                  'opened_friday', 'opened_saturday', 'opened_sunday']
+
+
+def build_stats(apps, schema_editor):
+    """Build task stats of existing users in one streaming pass over tasks"""
+    User = apps.get_model('accounts', 'User')
+    Task = apps.get_model('api', 'Task')
+    UserTaskStats = apps.get_model('api', 'UserTaskStats')
+    UserCompletionDay = apps.get_model('api', 'UserCompletionDay')
+
+    stats = {user_id: UserTaskStats(user_id=user_id)
+             for user_id in User.objects.values_list('pk', flat=True)}
+    days = {}
+
+    tasks = Task.objects.order_by().values_list(
+        'user_id', 'completionStatus', 'completionDate', 'dueDate', 'creationDate')
+    for user_id, completed, completion_date, due_date, creation_date in tasks.iterator():
+        user_stats = stats[user_id]
+        user_stats.total += 1
+        field = WEEKDAY_FIELDS[creation_date.weekday()]
+        setattr(user_stats, field, getattr(user_stats, field) + 1)
+
+        if completed:
+            user_stats.completed += 1
+            if completion_date is not None:
+                user_stats.completed_late += completion_date > due_date
+                key = (user_id, completion_date.date())
+                days[key] = days.get(key, 0) + 1
+
+    UserTaskStats.objects.bulk_create(stats.values(), batch_size=1000)
+    UserCompletionDay.objects.bulk_create(
+        [UserCompletionDay(user_id=user_id, day=day, tasks=tasks)
+         for (user_id, day), tasks in days.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0006_alter_user_username'),
+        ('api', '0004_task_user_title_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to='accounts.user')),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('completed_late', models.IntegerField(default=0)),
+                ('opened_monday', models.IntegerField(default=0)),
+                ('opened_tuesday', models.IntegerField(default=0)),
+                ('opened_wednesday', models.IntegerField(default=0)),
+                ('opened_thursday', models.IntegerField(default=0)),
+                ('opened_friday', models.IntegerField(default=0)),
+                ('opened_saturday', models.IntegerField(default=0)),
+                ('opened_sunday', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserCompletionDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tasks', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usercompletionday',
+            index=models.Index(fields=['user', '-tasks', 'day'], name='completion_day_user_tasks_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='usercompletionday',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='unique_completion_day_per_user'),
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
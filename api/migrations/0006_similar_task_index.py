@@ -0,0 +1,197 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:03
+
+import hashlib
+import random
+from collections import Counter
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# similarity functions of api.similarity at the time of this migration, copied
+# so later changes of the module do not change what this migration builds
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def title_words(title):
+    """Return set of words of title (split on single spaces)"""
+    return set(title.split(' '))
+
+
+def jaccard(words, other_words):
+    """Return jaccard similarity of two word sets"""
+    return len(words & other_words) / len(words | other_words)
+
+
+def _postings(words):
+    """Return inverted index of word -> positions of titles containing it"""
+    postings = {}
+    for position, title_words_set in enumerate(words):
+        for word in title_words_set:
+            postings.setdefault(word, set()).add(position)
+    return postings
+
+
+def subset_pairs(titles):
+    """
+    Return (position, position) pairs of titles in which every word of
+    the shorter title appears in the longer one (either way on equal length).
+
+    Titles are indexed by word, and the titles containing every word of
+    a title are found by intersecting its words' postings (rarest word
+    first), so only titles sharing words are ever compared.
+    """
+    words = [title_words(title) for title in titles]
+    postings = _postings(words)
+
+    pairs = set()
+    for position, title_words_set in enumerate(words):
+        ordered_words = sorted(title_words_set, key=lambda word: len(postings[word]))
+        candidates = set(postings[ordered_words[0]])
+        for word in ordered_words[1:]:
+            if len(candidates) == 1:
+                break
+            candidates &= postings[word]
+
+        for candidate in candidates:
+            if candidate != position and len(titles[position]) <= len(titles[candidate]):
+                pairs.add((min(position, candidate), max(position, candidate)))
+
+    return sorted(pairs)
+
+
+def jaccard_pairs(titles, threshold=0.5):
+    """
+    Return (position, position) pairs of titles with jaccard similarity of
+    at least threshold. Shared words are counted through the inverted index.
+    """
+    words = [title_words(title) for title in titles]
+    postings = _postings(words)
+
+    pairs = []
+    for position, title_words_set in enumerate(words):
+        shared = Counter()
+        for word in title_words_set:
+            shared.update(candidate for candidate in postings[word] if candidate > position)
+
+        for candidate, count in shared.items():
+            union = len(title_words_set) + len(words[candidate]) - count
+            if count / union >= threshold:
+                pairs.append((position, candidate))
+
+    return sorted(pairs)
+
+
+def minhash_pairs(titles, threshold=0.5, permutations=32, bands=8):
+    """
+    Return (position, position) pairs of titles with jaccard similarity of
+    at least threshold, comparing only titles which share a MinHash LSH
+    bucket. Approximate: pairs near the threshold may be missed.
+    """
+    rows = permutations // bands
+    rng = random.Random(permutations)
+    coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME))
+                    for _ in range(rows * bands)]
+
+    word_hashes = {}
+    words = [title_words(title) for title in titles]
+    buckets = {}
+    for position, title_words_set in enumerate(words):
+        hashes = []
+        for word in title_words_set:
+            if word not in word_hashes:
+                word_hashes[word] = int.from_bytes(
+                    hashlib.blake2b(word.encode(), digest_size=8).digest(), 'big')
+            hashes.append(word_hashes[word])
+
+        signature = [min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+                     for a, b in coefficients]
+        for band in range(bands):
+            key = (band, tuple(signature[band*rows:(band+1)*rows]))
+            buckets.setdefault(key, []).append(position)
+
+    candidates = set()
+    for positions in buckets.values():
+        for index, position in enumerate(positions):
+            for candidate in positions[index+1:]:
+                candidates.add((position, candidate))
+
+    return sorted(pair for pair in candidates
+                  if jaccard(words[pair[0]], words[pair[1]]) >= threshold)
+
+
+def find_pairs(titles, mode='subset', threshold=0.5, permutations=32, bands=8):
+    """Return (position, position) pairs of similar titles in given mode"""
+    if mode == 'subset':
+        return subset_pairs(titles)
+    if mode == 'jaccard':
+        return jaccard_pairs(titles, threshold)
+    if mode == 'minhash':
+        return minhash_pairs(titles, threshold, permutations, bands)
+    raise ValueError('unknown similarity mode ' + str(mode))
+
+
+
+def build_index(apps, schema_editor):
+    """Build word index and similar pairs of existing tasks"""
+    Task = apps.get_model('api', 'Task')
+    TaskToken = apps.get_model('api', 'TaskToken')
+    SimilarTaskPair = apps.get_model('api', 'SimilarTaskPair')
+    options = {'mode': settings.SIMILAR_TASKS_MODE,
+               'threshold': settings.SIMILAR_TASKS_THRESHOLD,
+               'permutations': settings.SIMILAR_TASKS_MINHASH_PERMUTATIONS,
+               'bands': settings.SIMILAR_TASKS_MINHASH_BANDS}
+
+    for user_id in Task.objects.order_by().values_list('user_id', flat=True).distinct():
+        tasks = list(Task.objects.filter(user_id=user_id).order_by('pk').values_list('pk', 'title'))
+        TaskToken.objects.bulk_create(
+            [TaskToken(user_id=user_id, task_id=pk, token=word)
+             for pk, title in tasks for word in title_words(title)], batch_size=1000)
+        SimilarTaskPair.objects.bulk_create(
+            [SimilarTaskPair(user_id=user_id, task_id=tasks[first][0],
+                             similar_task_id=tasks[second][0])
+             for first, second in find_pairs([title for _, title in tasks], **options)],
+            batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0005_usertaskstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='api.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SimilarTaskPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similar_task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.task')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tasktoken',
+            index=models.Index(fields=['user', 'token'], name='task_token_user_token_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasktoken',
+            constraint=models.UniqueConstraint(fields=('task', 'token'), name='unique_token_per_task'),
+        ),
+        migrations.AddConstraint(
+            model_name='similartaskpair',
+            constraint=models.UniqueConstraint(fields=('task', 'similar_task'), name='unique_similar_task_pair'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_similar_task_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['dueDate'], name='task_due_date_idx'),
+        ),
+    ]
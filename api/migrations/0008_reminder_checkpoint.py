@@ -0,0 +1,31 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_task_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField()),
+                ('shard', models.PositiveIntegerField()),
+                ('shard_count', models.PositiveIntegerField()),
+                ('last_user_id', models.IntegerField(default=0)),
+                ('users', models.IntegerField(default=0)),
+                ('sent', models.IntegerField(default=0)),
+                ('finished', models.BooleanField(default=False)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='remindercheckpoint',
+            constraint=models.UniqueConstraint(fields=('run_date', 'shard', 'shard_count'), name='unique_reminder_checkpoint'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_reminder_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='remindercheckpoint',
+            old_name='sent',
+            new_name='queued',
+        ),
+    ]
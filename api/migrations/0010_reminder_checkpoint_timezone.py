@@ -0,0 +1,26 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_reminder_checkpoint_queued'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='remindercheckpoint',
+            name='unique_reminder_checkpoint',
+        ),
+        migrations.AddField(
+            model_name='remindercheckpoint',
+            name='timezone',
+            field=models.CharField(blank=True, default='', max_length=63),
+        ),
+        migrations.AddConstraint(
+            model_name='remindercheckpoint',
+            constraint=models.UniqueConstraint(fields=('run_date', 'timezone', 'shard', 'shard_count'), name='unique_reminder_checkpoint'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.5 on 2026-10-18 14:17
+
+import hashlib
+from django.db import migrations, models
+
+
+def hash_attachments(apps, schema_editor):
+    """Store sha256 and size of existing attachments (missing files are skipped)"""
+    Task = apps.get_model('api', 'Task')
+
+    for task in Task.objects.exclude(attachment='').exclude(attachment__isnull=True).iterator():
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with task.attachment.open('rb') as attachment:
+                for chunk in attachment.chunks():
+                    sha256.update(chunk)
+                    size += len(chunk)
+        except OSError:
+            continue
+        Task.objects.filter(pk=task.pk).update(attachment_hash=sha256.hexdigest(),
+                                               attachment_size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_reminder_checkpoint_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attachment_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='attachment_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(hash_attachments, migrations.RunPython.noop),
+    ]
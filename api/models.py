@@ -1,8 +1,32 @@
 """Module to create models for API."""
-from django.db.models.signals import post_delete
-from django.db import models
+import hashlib
+import os
+from collections import Counter
+from contextvars import ContextVar
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.db import models, router, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
 from django.dispatch import receiver
+from django.utils import timezone
 from accounts.models import User
+from .report_cache import invalidate_reports
+from .storage import BlobStorage
+from .similarity import title_words, similar_to, find_pairs
+
+
+# UserTaskStats columns counting tasks opened on each weekday (Monday first)
+WEEKDAY_FIELDS = ['opened_monday', 'opened_tuesday', 'opened_wednesday', 'opened_thursday',
+                  'opened_friday', 'opened_saturday', 'opened_sunday']
+
+# Task columns a task's contribution to UserTaskStats depends on
+STATS_FIELDS = ('completionStatus', 'completionDate', 'dueDate', 'creationDate')
+
+# True while TaskManager.bulk_delete deletes tasks, whose post_delete
+# bookkeeping (attachments, stats, reports) it then does once for all of them
+_bulk_deleting = ContextVar('bulk_deleting', default=False)
 
 
 def upload_location(instance, filename, **kwargs):
@@ -14,29 +38,635 @@ def upload_location(instance, filename, **kwargs):
     return file_path
 
 
+def blob_location(instance, filename, **kwargs):
+    """
+    Content addressed location of attachment being saved, named by its
+    sha256: attachments/blobs/<first 2 hex digits>/<sha256><extension>.
+    Sets attachment_hash and attachment_size of instance.
+    """
+    uploaded_file = instance.attachment.file
+    # AttachmentUploadHandler hashes files while they are received
+    digest = getattr(uploaded_file, 'sha256', None)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+    instance.attachment_hash = digest
+    instance.attachment_size = uploaded_file.size
+    _, extension = os.path.splitext(filename)
+    return 'attachments/blobs/{}/{}{}'.format(digest[:2], digest, extension.lower())
+
+
+class TaskManager(models.Manager):
+    """Class to manage task queries"""
+
+    def validation_counts(self, user_id, title, current_title=None):
+        """
+        Count user's tasks, tasks already using title and tasks named
+        current_title in a single aggregate query. When current_title
+        is given (task being updated) that task is not counted as taken.
+        """
+        taken = Q(title=title)
+        if current_title is not None:
+            taken &= ~Q(title=current_title)
+
+        return self.filter(user_id=user_id).aggregate(
+            total=Count('pk'),
+            taken=Count('pk', filter=taken),
+            current=Count('pk', filter=Q(title=current_title)))
+
+    def attachment_usage(self, user_id, exclude_title=None):
+        """Return bytes of attachments stored by user, not counting task exclude_title"""
+        tasks = self.filter(user_id=user_id)
+        if exclude_title is not None:
+            tasks = tasks.exclude(title=exclude_title)
+        return tasks.aggregate(used=Sum('attachment_size'))['used'] or 0
+
+    def stats_aggregates(self, user_id):
+        """Compute UserTaskStats counters of user from task table in one query"""
+
+        aggregates = {
+            'total': Count('pk'),
+            'completed': Count('pk', filter=Q(completionStatus=True)),
+            'completed_late': Count('pk', filter=Q(completionStatus=True,
+                                                   completionDate__gt=F('dueDate'))),
+        }
+
+        # week_day lookup numbers days from 1 (Sunday) to 7 (Saturday)
+        for index, field in enumerate(WEEKDAY_FIELDS):
+            aggregates[field] = Count('pk', filter=Q(creationDate__week_day=(index + 1) % 7 + 1))
+
+        return self.filter(user_id=user_id).aggregate(**aggregates)
+
+    def completion_days(self, user_id):
+        """Return (date, completed tasks) pairs of user from task table"""
+
+        return (self.filter(user_id=user_id, completionStatus=True, completionDate__isnull=False)
+                .annotate(day=TruncDate('completionDate'))
+                .values_list('day')
+                .annotate(tasks=Count('pk'))
+                .order_by('day'))
+
+    def bulk_changed(self, user_id, titles_changed=False):
+        """
+        Update what task signals maintain after tasks of user were changed
+        in bulk (bulk_create and bulk_update send no signals, bulk_delete
+        skips the post_delete receivers).
+        """
+        UserTaskStats.objects.rebuild(user_id)
+        if titles_changed:
+            SimilarTaskPair.objects.rebuild(user_id)
+        transaction.on_commit(lambda: invalidate_reports(user_id))
+
+    def bulk_delete(self, user_id, titles):
+        """
+        Delete user's tasks with given titles in one transaction with a
+        single queryset delete, releasing their attachments and updating
+        stats once for all tasks instead of per task post_delete receivers.
+        Return set of deleted titles.
+        """
+        with transaction.atomic():
+            tasks = self.filter(user_id=user_id, title__in=titles)
+            deleted = list(tasks.values_list('title', 'attachment'))
+            if not deleted:
+                return set()
+
+            bulk_deleting = _bulk_deleting.set(True)
+            try:
+                tasks.delete()
+            finally:
+                _bulk_deleting.reset(bulk_deleting)
+
+            AttachmentBlob.objects.release_many([attachment for _, attachment in deleted])
+            self.bulk_changed(user_id)
+
+        return {title for title, _ in deleted}
+
+
 class Task(models.Model):
     """Model to define columns for todo tasks."""
 
     user = models.ForeignKey(User, on_delete = models.CASCADE)
     title = models.CharField(max_length=50)
     description = models.TextField(null=True, blank=True)
-    attachment = models.FileField(upload_to=upload_location, null=True, blank=True)
+    attachment = models.FileField(upload_to=blob_location, storage=BlobStorage(),
+                                  null=True, blank=True)
+    # sha256 hex digest and size in bytes of attachment, set when it is uploaded
+    attachment_hash = models.CharField(max_length=64, blank=True, default='')
+    attachment_size = models.BigIntegerField(default=0)
     creationDate = models.DateTimeField(auto_now_add=True)
     dueDate = models.DateTimeField()
     completionDate = models.DateTimeField(null=True, blank=True)
     completionStatus = models.BooleanField(default=False)
 
+    objects = TaskManager()
+
     def __str__(self):
         """Returns title of task when convert task object to string."""
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Save task in one transaction with the stats, similar pairs and
+        attachment references its post_save receivers update.
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember loaded title, attachment and stats columns of loaded task
+        (its contribution to user's stats is only computed when it is saved).
+        """
+        instance = super().from_db(db, field_names, values)
+        deferred_fields = instance.get_deferred_fields()
+        if deferred_fields.isdisjoint(STATS_FIELDS):
+            instance._loaded_stats = instance.stats_values()
+        if 'title' not in deferred_fields:
+            instance._loaded_title = instance.title
+        if 'attachment' not in deferred_fields:
+            instance._loaded_attachment = instance.attachment.name
+        return instance
+
+    def stats_values(self):
+        """Return values of STATS_FIELDS columns of task"""
+        return tuple(getattr(self, field_name) for field_name in STATS_FIELDS)
+
+    def stats_contribution(self, values=None):
+        """
+        Return (completed, completed late, creation weekday, completion day)
+        this task adds to UserTaskStats of its user, or would add with given
+        stats_values.
+        """
+        values = dict(zip(STATS_FIELDS, values or self.stats_values()))
+        completion_status = self._meta.get_field('completionStatus').to_python(
+            values['completionStatus'])
+        creation_date = self._utc_value('creationDate', values['creationDate'])
+        completion_date = self._utc_value('completionDate', values['completionDate'])
+        due_date = self._utc_value('dueDate', values['dueDate'])
+
+        completed = bool(completion_status)
+        late = completed and completion_date is not None and completion_date > due_date
+        weekday = creation_date.weekday() if creation_date is not None else None
+        day = completion_date.date() if completed and completion_date is not None else None
+        return int(completed), int(late), weekday, day
+
+    def _utc_value(self, field_name, value):
+        """Return value of datetime field as aware UTC datetime (values may still be strings)"""
+        value = self._meta.get_field(field_name).to_python(value)
+        if value is None:
+            return None
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value.astimezone(dt_timezone.utc)
+
     class Meta:
         ordering = ['completionStatus', 'dueDate']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'title'], name='unique_task_title_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'completionStatus', 'dueDate'],
+                         name='task_user_status_due_idx'),
+            models.Index(fields=['dueDate'], name='task_due_date_idx'),
+        ]
+
+
+class AttachmentBlobManager(models.Manager):
+    """Class to count references of tasks to stored attachment files"""
+
+    def acquire(self, name, sha256='', size=0):
+        """
+        Add a reference to attachment file name (same queries whether it is
+        new or not), again if the sweeper deleted its blob meanwhile.
+        """
+        while True:
+            self.bulk_create([AttachmentBlob(name=name, sha256=sha256, size=size, refcount=0)],
+                             ignore_conflicts=True)
+            if self.filter(name=name).update(refcount=F('refcount') + 1):
+                return
+
+    def release(self, name):
+        """
+        Remove a reference to attachment file name and queue the file for
+        deletion once no task references it. Files stored before attachments
+        were content addressed have no blob and belong to one task, so they
+        are queued directly. Files (and blobs left without references) are
+        deleted by api.cleanup.sweep_deletions.
+        """
+        if not name:
+            return
+
+        if self.filter(name=name).update(refcount=F('refcount') - 1):
+            if not self.filter(name=name, refcount__lte=0).exists():
+                return
+
+        AttachmentDeletion.objects.create(name=name)
+
+    def release_many(self, names):
+        """Release one reference per occurrence of attachment file names, in bulk"""
+        counts = Counter(name for name in names if name)
+        if not counts:
+            return
+
+        names_by_count = {}
+        for name, count in counts.items():
+            names_by_count.setdefault(count, []).append(name)
+        for count, group in names_by_count.items():
+            self.filter(name__in=group).update(refcount=F('refcount') - count)
+
+        refcounts = dict(self.filter(name__in=counts).values_list('name', 'refcount'))
+        released = [name for name in counts if refcounts.get(name, 0) <= 0]
+        AttachmentDeletion.objects.bulk_create([AttachmentDeletion(name=name)
+                                                for name in sorted(released)])
+
+
+class AttachmentBlob(models.Model):
+    """
+    Model to count tasks referencing each content addressed attachment
+    file, so identical files are stored once and deleted with their
+    last task. Blobs without references are kept until the sweeper
+    deletes their file, their row locks the file meanwhile.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AttachmentBlobManager()
+
+    def __str__(self):
+        """Returns name of blob file."""
+        return self.name
+
+
+class AttachmentDeletion(models.Model):
+    """
+    Model to queue attachment files no task references any more, deleted
+    from storage in the background instead of inside the request.
+    """
+
+    name = models.CharField(max_length=255)
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Returns name of file to delete."""
+        return self.name
+
+
+class UserTaskStatsManager(models.Manager):
+    """Class to maintain per user task counters"""
+
+    def for_user(self, user_id):
+        """Return stats of user, building them from task table if missing"""
+        try:
+            return self.get(user_id=user_id)
+        except UserTaskStats.DoesNotExist:
+            return self.rebuild(user_id)
+
+    def rebuild(self, user_id):
+        """Recompute stats and completion days of user from task table"""
+        with transaction.atomic():
+            stats, _ = self.update_or_create(user_id=user_id,
+                                             defaults=Task.objects.stats_aggregates(user_id))
+            UserCompletionDay.objects.filter(user_id=user_id).delete()
+            UserCompletionDay.objects.bulk_create(
+                [UserCompletionDay(user_id=user_id, day=day, tasks=tasks)
+                 for day, tasks in Task.objects.completion_days(user_id)])
+        return stats
+
+    def differences(self, user_id):
+        """
+        Compare stored stats of user with stats computed from task table.
+        Return dict of {field: (stored, actual)} for every mismatch.
+        """
+        actual = Task.objects.stats_aggregates(user_id)
+        actual['completion_days'] = dict(Task.objects.completion_days(user_id))
+
+        stats = self.filter(user_id=user_id).values(*actual.keys() - {'completion_days'}).first()
+        stored = stats or {field: None for field in actual}
+        stored['completion_days'] = dict(UserCompletionDay.objects.filter(
+            user_id=user_id, tasks__gt=0).values_list('day', 'tasks'))
+
+        return {field: (stored[field], actual[field])
+                for field in actual if stored[field] != actual[field]}
+
+    def apply_change(self, user_id, old, new):
+        """
+        Apply change of one task to user's stats. old and new are task
+        contributions (Task.stats_contribution) before and after the
+        change, None when task did not exist before or after it.
+        Return False if user has no stats row to update.
+        """
+        if old == new:
+            return True
+
+        old_completed, old_late, old_weekday, old_day = old or (0, 0, None, None)
+        new_completed, new_late, new_weekday, new_day = new or (0, 0, None, None)
+
+        changes = {}
+        if (old is None) != (new is None):
+            changes['total'] = F('total') + (1 if old is None else -1)
+        if old_completed != new_completed:
+            changes['completed'] = F('completed') + new_completed - old_completed
+        if old_late != new_late:
+            changes['completed_late'] = F('completed_late') + new_late - old_late
+        if old_weekday != new_weekday:
+            if old_weekday is not None:
+                changes[WEEKDAY_FIELDS[old_weekday]] = F(WEEKDAY_FIELDS[old_weekday]) - 1
+            if new_weekday is not None:
+                changes[WEEKDAY_FIELDS[new_weekday]] = F(WEEKDAY_FIELDS[new_weekday]) + 1
+
+        with transaction.atomic():
+            if changes and not self.filter(user_id=user_id).update(**changes):
+                return False
+
+            if old_day != new_day:
+                if old_day is not None:
+                    UserCompletionDay.objects.filter(user_id=user_id, day=old_day).update(
+                        tasks=F('tasks') - 1)
+                if new_day is not None:
+                    day, _ = UserCompletionDay.objects.get_or_create(user_id=user_id, day=new_day)
+                    UserCompletionDay.objects.filter(pk=day.pk).update(tasks=F('tasks') + 1)
+        return True
+
+
+class UserTaskStats(models.Model):
+    """
+    Model to keep counters of user's tasks updated on every task
+    save and delete, so reports read one row instead of all tasks.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='task_stats')
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    completed_late = models.IntegerField(default=0)
+    opened_monday = models.IntegerField(default=0)
+    opened_tuesday = models.IntegerField(default=0)
+    opened_wednesday = models.IntegerField(default=0)
+    opened_thursday = models.IntegerField(default=0)
+    opened_friday = models.IntegerField(default=0)
+    opened_saturday = models.IntegerField(default=0)
+    opened_sunday = models.IntegerField(default=0)
+
+    objects = UserTaskStatsManager()
+
+    def __str__(self):
+        """Returns username of stats owner."""
+        return str(self.user_id)
+
+
+class UserCompletionDay(models.Model):
+    """Model to count tasks a user completed on each day (UTC)."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    tasks = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_completion_day_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-tasks', 'day'], name='completion_day_user_tasks_idx'),
+        ]
+
+
+
+class TaskToken(models.Model):
+    """Model to index words of task titles, to find tasks sharing words."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='tokens')
+    token = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'token'], name='unique_token_per_task'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'token'], name='task_token_user_token_idx'),
+        ]
+
+
+class SimilarTaskPairManager(models.Manager):
+    """Class to maintain precomputed similar task pairs"""
+
+    @staticmethod
+    def options():
+        """Return similarity mode and its options from settings"""
+        return {'mode': settings.SIMILAR_TASKS_MODE,
+                'threshold': settings.SIMILAR_TASKS_THRESHOLD,
+                'permutations': settings.SIMILAR_TASKS_MINHASH_PERMUTATIONS,
+                'bands': settings.SIMILAR_TASKS_MINHASH_BANDS}
+
+    def index_task(self, task):
+        """
+        Re-index words of task title and recompute pairs of the task,
+        comparing it only with tasks sharing at least one word.
+        """
+        words = title_words(task.title)
+
+        with transaction.atomic():
+            TaskToken.objects.filter(task=task).delete()
+            TaskToken.objects.bulk_create([TaskToken(user_id=task.user_id, task=task, token=word)
+                                           for word in words])
+
+            self.filter(Q(task=task) | Q(similar_task=task)).delete()
+            candidates = list(Task.objects.filter(user_id=task.user_id, tokens__token__in=words)
+                              .exclude(pk=task.pk).order_by().values_list('pk', 'title')
+                              .distinct())
+            similar = similar_to(task.title, [title for _, title in candidates], **self.options())
+            self.bulk_create([
+                SimilarTaskPair(user_id=task.user_id, task_id=min(task.pk, pk),
+                                similar_task_id=max(task.pk, pk))
+                for pk, _ in (candidates[position] for position in similar)])
+
+    def rebuild(self, user_id):
+        """Recompute word index and similar pairs of all tasks of user"""
+        tasks = list(Task.objects.filter(user_id=user_id).order_by('pk').values_list('pk', 'title'))
+        titles = [title for _, title in tasks]
+
+        with transaction.atomic():
+            TaskToken.objects.filter(user_id=user_id).delete()
+            TaskToken.objects.bulk_create(
+                [TaskToken(user_id=user_id, task_id=pk, token=word)
+                 for pk, title in tasks for word in title_words(title)], batch_size=1000)
+
+            self.filter(user_id=user_id).delete()
+            self.bulk_create(
+                [SimilarTaskPair(user_id=user_id, task_id=tasks[first][0],
+                                 similar_task_id=tasks[second][0])
+                 for first, second in find_pairs(titles, **self.options())], batch_size=1000)
+
+    def pairs_for_user(self, user_id):
+        """Return [title, title] pairs of user ordered as the task list"""
+        rows = self.filter(user_id=user_id).values_list(
+            'task__completionStatus', 'task__dueDate', 'task_id', 'task__title',
+            'similar_task__completionStatus', 'similar_task__dueDate', 'similar_task_id',
+            'similar_task__title')
+
+        pairs = sorted(sorted([row[:4], row[4:]]) for row in rows)
+        return [[first[3], second[3]] for first, second in pairs]
+
+
+class SimilarTaskPair(models.Model):
+    """
+    Model to keep precomputed pairs of similar tasks (in SIMILAR_TASKS_MODE),
+    updated whenever a task is created or retitled.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='+')
+    similar_task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='+')
+
+    objects = SimilarTaskPairManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'similar_task'], name='unique_similar_task_pair'),
+        ]
+
+
+class ReminderCheckpoint(models.Model):
+    """
+    Model to record progress of one shard of a daily remainder run, so a
+    crashed run resumes after the last user whose remainder was sent.
+    """
+
+    run_date = models.DateField()
+    # time zone of the users of an hourly run, blank for a run over all users
+    timezone = models.CharField(max_length=63, blank=True, default='')
+    shard = models.PositiveIntegerField()
+    shard_count = models.PositiveIntegerField()
+    last_user_id = models.IntegerField(default=0)
+    users = models.IntegerField(default=0)
+    queued = models.IntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run_date', 'timezone', 'shard', 'shard_count'],
+                                    name='unique_reminder_checkpoint'),
+        ]
+
+    def __str__(self):
+        """Returns run date and shard of checkpoint."""
+        return '{} {} {}/{}'.format(self.run_date, self.timezone, self.shard, self.shard_count)
 
 
 
 @receiver(post_delete, sender=Task)
 def submission_delete(instance, **kwargs):
-    """Delete attachment when task is deleted"""
+    """Release attachment of deleted task (file is deleted with its last task)"""
+
+    if not _bulk_deleting.get():
+        AttachmentBlob.objects.release(instance.attachment.name)
+
+
+@receiver(post_save, sender=Task)
+def task_saved_attachment(instance, created, update_fields=None, **kwargs):
+    """Reference new attachment of saved task and release the one it replaced"""
+
+    if update_fields is not None and 'attachment' not in update_fields:
+        return
+    if not created and not hasattr(instance, '_loaded_attachment'):
+        # task was loaded without its attachment, which save left unchanged
+        return
+
+    old_name = None if created else instance._loaded_attachment
+    new_name = instance.attachment.name or None
+    if new_name == old_name:
+        return
+
+    if new_name:
+        AttachmentBlob.objects.acquire(new_name, instance.attachment_hash,
+                                       instance.attachment_size)
+        storage = instance.attachment.storage
+        if not storage.exists(new_name):
+            # storage skipped writing a file already stored, which the
+            # sweeper deleted before the reference above
+            storage.save(new_name, instance.attachment.file)
+    if old_name:
+        AttachmentBlob.objects.release(old_name)
+    instance._loaded_attachment = new_name
+
+
+@receiver([post_save, post_delete], sender=Task)
+def task_changed(instance, **kwargs):
+    """
+    Delete cached reports of user once the change of one of their tasks is
+    committed (a report read before the commit would cache the old tasks).
+    """
+    if _bulk_deleting.get():
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_reports(user_id))
+
+
+@receiver(post_save, sender=Task)
+def task_saved_stats(instance, created, **kwargs):
+    """Update user's stats with the difference made by saved task"""
+
+    values = instance.stats_values()
+    if created:
+        old = None
+    elif hasattr(instance, '_loaded_stats'):
+        if values == instance._loaded_stats:
+            return
+        old = instance.stats_contribution(instance._loaded_stats)
+    else:
+        # task was loaded without the columns stats depend on
+        UserTaskStats.objects.rebuild(instance.user_id)
+        instance._loaded_stats = values
+        return
+
+    if not UserTaskStats.objects.apply_change(instance.user_id, old,
+                                              instance.stats_contribution(values)):
+        UserTaskStats.objects.rebuild(instance.user_id)
+    instance._loaded_stats = values
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted_stats(instance, **kwargs):
+    """Remove deleted task from user's stats"""
+
+    # stats row may already be gone when the user itself is being deleted,
+    # so stats are only changed (never created) here
+    if _bulk_deleting.get():
+        return
+    if hasattr(instance, '_loaded_stats'):
+        UserTaskStats.objects.apply_change(instance.user_id,
+                                           instance.stats_contribution(instance._loaded_stats),
+                                           None)
+    elif UserTaskStats.objects.filter(user_id=instance.user_id).exists():
+        UserTaskStats.objects.rebuild(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved_similarity(instance, created, update_fields=None, **kwargs):
+    """Update similar task pairs when task is created or retitled"""
+
+    if update_fields is not None and 'title' not in update_fields:
+        return
+    if not created and getattr(instance, '_loaded_title', None) == instance.title:
+        return
+
+    SimilarTaskPair.objects.index_task(instance)
+    instance._loaded_title = instance.title
+
+
+@receiver(post_save, sender=User)
+def create_task_stats(instance, created, **kwargs):
+    """Create empty task stats for new user"""
 
-    instance.attachment.delete(False)
+    if created:
+        UserTaskStats.objects.get_or_create(user=instance)
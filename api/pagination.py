@@ -0,0 +1,90 @@
+"""Module to define pagination for API views"""
+import base64
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over task ordering (completionStatus, dueDate, id).
+    Cursor encodes the last task of a page, so every page is an indexed
+    range query instead of an OFFSET scan. Pagination is only applied
+    when 'cursor' or 'page_size' is present in query params.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    ordering = ('completionStatus', 'dueDate', 'pk')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of tasks or None if pagination is not requested"""
+
+        if (self.cursor_query_param not in request.query_params and
+            self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            completion_status, due_date, pk = cursor
+            queryset = queryset.filter(
+                Q(completionStatus__gt=completion_status) |
+                Q(completionStatus=completion_status, dueDate__gt=due_date) |
+                Q(completionStatus=completion_status, dueDate=due_date, pk__gt=pk))
+
+        results = list(queryset[:page_size+1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        """Wrap page data with link to next page"""
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_page_size(self, request):
+        """Return page size from query params bounded by max_page_size"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_next_link(self):
+        """Return url of next page or None on last page"""
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        position = [last.completionStatus, last.dueDate.isoformat(), last.pk]
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """Return (completionStatus, dueDate, pk) from cursor query param"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            completion_status, due_date, pk = json.loads(base64.urlsafe_b64decode(encoded))
+            due_date = parse_datetime(due_date)
+            if not isinstance(completion_status, bool) or due_date is None:
+                raise ValueError
+            return completion_status, due_date, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,29 @@
+"""Module to manage cached reports of users"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+REPORTS = ('TotalTasks', 'AverageCompleted', 'OverdueTasks',
+           'MaxDate', 'CountOpened', 'ReportSummary')
+
+
+def report_cache_key(user_id, report):
+    """Return cache key of user's report"""
+    return str(user_id)+'_'+report
+
+
+def get_report(user_id, report):
+    """Return cached report of user or None"""
+    return cache.get(report_cache_key(user_id, report))
+
+
+def set_report(user_id, report, value, timeout=None):
+    """Cache user's report for timeout seconds, at most REPORT_CACHE_TTL"""
+    if timeout is None or timeout > settings.REPORT_CACHE_TTL:
+        timeout = settings.REPORT_CACHE_TTL
+    cache.set(report_cache_key(user_id, report), value, timeout)
+
+
+def invalidate_reports(user_id):
+    """Delete all cached reports of user"""
+    cache.delete_many([report_cache_key(user_id, report) for report in REPORTS])
@@ -3,8 +3,48 @@ from rest_framework import serializers
 from .models import Task
 
 class TaskSerializer(serializers.ModelSerializer):
-    """Serialize task data"""
+    """
+    Serialize task data.
+    Takes optional 'fields' argument to serialize only a subset of fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def update(self, instance, validated_data):
+        """
+        Update task saving only the columns whose values changed
+        (with hash and size of a new attachment).
+        """
+        if instance.pk is None:
+            # new task passed in by task create view
+            return super().update(instance, validated_data)
+
+        changed = []
+        for field_name, value in validated_data.items():
+            field = instance._meta.get_field(field_name)
+            if field.is_relation:
+                old, new = getattr(instance, field.attname), getattr(value, 'pk', value)
+            else:
+                old, new = getattr(instance, field_name), value
+            if field_name == 'attachment' or old != new:
+                setattr(instance, field_name, value)
+                changed.append(field_name)
+
+        if 'attachment' in changed:
+            if not instance.attachment:
+                instance.attachment_hash, instance.attachment_size = '', 0
+            changed += ['attachment_hash', 'attachment_size']
+        if changed:
+            instance.save(update_fields=changed)
+        return instance
 
     class Meta:
         model = Task
         fields = "__all__"
+        read_only_fields = ('attachment_hash', 'attachment_size')
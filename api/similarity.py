@@ -0,0 +1,190 @@
+"""Module to find similar tasks of a user"""
+import hashlib
+import random
+from collections import Counter
+from functools import lru_cache
+
+
+# subset: every word of the shorter title appears in the longer one
+# jaccard: shared words / all words of both titles >= threshold
+# minhash: jaccard, with candidate pairs found by MinHash LSH buckets
+SIMILARITY_MODES = ('subset', 'jaccard', 'minhash')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def title_words(title):
+    """Return set of words of title (split on single spaces)"""
+    return set(title.split(' '))
+
+
+def jaccard(words, other_words):
+    """Return jaccard similarity of two word sets"""
+    return len(words & other_words) / len(words | other_words)
+
+
+def _subset_similar(title, words, other_title, other_words):
+    """Return True if every word of the shorter title appears in the longer one"""
+    if len(title) < len(other_title):
+        return words <= other_words
+    if len(title) > len(other_title):
+        return other_words <= words
+    return words <= other_words or other_words <= words
+
+
+def similar_to(title, other_titles, mode='subset', threshold=0.5, permutations=32, bands=8):
+    """
+    Return positions of other_titles similar to title in given mode, deciding
+    each pair as find_pairs does (in minhash mode only titles sharing an LSH
+    bucket are similar), so pairs kept up to date per task match a rebuild.
+    """
+    words = title_words(title)
+    others = [title_words(other_title) for other_title in other_titles]
+
+    if mode == 'subset':
+        return [position for position, other_words in enumerate(others)
+                if _subset_similar(title, words, other_titles[position], other_words)]
+    if mode == 'jaccard':
+        return [position for position, other_words in enumerate(others)
+                if jaccard(words, other_words) >= threshold]
+    if mode == 'minhash':
+        keys = minhash_bands(words, permutations, bands)
+        return [position for position, other_words in enumerate(others)
+                if jaccard(words, other_words) >= threshold
+                and not keys.isdisjoint(minhash_bands(other_words, permutations, bands))]
+    raise ValueError('unknown similarity mode ' + str(mode))
+
+
+def is_similar(title, other_title, mode='subset', threshold=0.5, permutations=32, bands=8):
+    """Return True if two titles are similar in given mode"""
+    return bool(similar_to(title, [other_title], mode, threshold, permutations, bands))
+
+
+def _postings(words):
+    """Return inverted index of word -> positions of titles containing it"""
+    postings = {}
+    for position, title_words_set in enumerate(words):
+        for word in title_words_set:
+            postings.setdefault(word, set()).add(position)
+    return postings
+
+
+def subset_pairs(titles):
+    """
+    Return (position, position) pairs of titles in which every word of
+    the shorter title appears in the longer one (either way on equal length,
+    where the former nested loop only checked the earlier title, so pairs of
+    titles with repeated words depended on the order of tasks).
+
+    Titles are indexed by word, and the titles containing every word of
+    a title are found by intersecting its words' postings (rarest word
+    first), so only titles sharing words are ever compared.
+    """
+    words = [title_words(title) for title in titles]
+    postings = _postings(words)
+
+    pairs = set()
+    for position, title_words_set in enumerate(words):
+        ordered_words = sorted(title_words_set, key=lambda word: len(postings[word]))
+        candidates = set(postings[ordered_words[0]])
+        for word in ordered_words[1:]:
+            if len(candidates) == 1:
+                break
+            candidates &= postings[word]
+
+        for candidate in candidates:
+            if candidate != position and len(titles[position]) <= len(titles[candidate]):
+                pairs.add((min(position, candidate), max(position, candidate)))
+
+    return sorted(pairs)
+
+
+def jaccard_pairs(titles, threshold=0.5):
+    """
+    Return (position, position) pairs of titles with jaccard similarity of
+    at least threshold. Shared words are counted through the inverted index.
+    """
+    words = [title_words(title) for title in titles]
+    postings = _postings(words)
+
+    pairs = []
+    for position, title_words_set in enumerate(words):
+        shared = Counter()
+        for word in title_words_set:
+            shared.update(candidate for candidate in postings[word] if candidate > position)
+
+        for candidate, count in shared.items():
+            union = len(title_words_set) + len(words[candidate]) - count
+            if count / union >= threshold:
+                pairs.append((position, candidate))
+
+    return sorted(pairs)
+
+
+@lru_cache(maxsize=None)
+def _minhash_coefficients(permutations):
+    """Return (a, b) coefficients of the permutations of MinHash signatures"""
+    rng = random.Random(permutations)
+    return [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME))
+            for _ in range(permutations)]
+
+
+def minhash_bands(words, permutations=32, bands=8, word_hashes=None):
+    """
+    Return MinHash LSH bucket keys (band, signature rows of band) of a word
+    set, titles sharing a key are compared. word_hashes caches word hashes.
+    """
+    rows = permutations // bands
+    if word_hashes is None:
+        word_hashes = {}
+
+    hashes = []
+    for word in words:
+        if word not in word_hashes:
+            word_hashes[word] = int.from_bytes(
+                hashlib.blake2b(word.encode(), digest_size=8).digest(), 'big')
+        hashes.append(word_hashes[word])
+
+    signature = [min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+                 for a, b in _minhash_coefficients(rows * bands)]
+    return {(band, tuple(signature[band*rows:(band+1)*rows])) for band in range(bands)}
+
+
+def minhash_pairs(titles, threshold=0.5, permutations=32, bands=8):
+    """
+    Return (position, position) pairs of titles with jaccard similarity of
+    at least threshold, comparing only titles which share a MinHash LSH
+    bucket. Approximate: pairs near the threshold may be missed.
+    """
+    word_hashes = {}
+    words = [title_words(title) for title in titles]
+    buckets = {}
+    for position, title_words_set in enumerate(words):
+        for key in minhash_bands(title_words_set, permutations, bands, word_hashes):
+            buckets.setdefault(key, []).append(position)
+
+    candidates = set()
+    for positions in buckets.values():
+        for index, position in enumerate(positions):
+            for candidate in positions[index+1:]:
+                candidates.add((position, candidate))
+
+    return sorted(pair for pair in candidates
+                  if jaccard(words[pair[0]], words[pair[1]]) >= threshold)
+
+
+def find_pairs(titles, mode='subset', threshold=0.5, permutations=32, bands=8):
+    """Return (position, position) pairs of similar titles in given mode"""
+    if mode == 'subset':
+        return subset_pairs(titles)
+    if mode == 'jaccard':
+        return jaccard_pairs(titles, threshold)
+    if mode == 'minhash':
+        return minhash_pairs(titles, threshold, permutations, bands)
+    raise ValueError('unknown similarity mode ' + str(mode))
+
+
+def similar_pairs(titles, mode='subset', **options):
+    """Return [title, title] pairs of similar titles, in the order titles are given"""
+    return [[titles[first], titles[second]]
+            for first, second in find_pairs(titles, mode, **options)]
@@ -0,0 +1,60 @@
+"""Module to define storage of task attachments"""
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class BlobStorage(FileSystemStorage):
+    """
+    File system storage for content addressed attachments. Names are
+    derived from the file's hash, so a file already stored under a name
+    has the same content and is not written again.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """Return name unchanged, an existing file under it is the same content"""
+        return name
+
+    def _save(self, name, content):
+        """
+        Write content unless already stored, moving an uploaded temporary
+        file or writing a temporary file renamed into place (a file swept before its task referenced it is written
+        again by api.models.task_saved_attachment).
+        """
+        if self.exists(name):
+            return name
+
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # uploads are already on disk, move them into place when the
+            # temporary file is on the same file system (else copy below)
+            temporary_path = content.temporary_file_path()
+            try:
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary_path, self.file_permissions_mode)
+                os.replace(temporary_path, full_path)
+                return str(name).replace('\\', '/')
+            except OSError:
+                pass
+
+        # concurrent uploads of the same content write their own temporary
+        # file and atomically replace each other with identical content
+        handle, temporary_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as temporary_file:
+                for chunk in content.chunks():
+                    temporary_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary_path, self.file_permissions_mode)
+            os.replace(temporary_path, full_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return str(name).replace('\\', '/')
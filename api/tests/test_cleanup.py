@@ -0,0 +1,87 @@
+"""Module to define test cases for attachment cleanup."""
+import os
+from unittest import mock
+from django.core.files.base import ContentFile
+from api.models import AttachmentBlob, AttachmentDeletion
+from api.cleanup import sweep_deletions, collect_orphans
+from utils.setup_test import AttachmentTestMixin, TestSetUp
+
+
+
+class TestAttachmentCleanup(AttachmentTestMixin, TestSetUp):
+    """Test cases for background deletion and orphan collection of attachment files"""
+
+    def test_sweep_deletes_queued_files(self):
+        """Queued files are deleted by the sweeper and the queue emptied"""
+        task = self.create_task('task', b'content')
+        name = task.attachment.name
+        task.delete()
+
+        self.assertEqual(sweep_deletions(), 1)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(AttachmentDeletion.objects.exists())
+        self.assertFalse(AttachmentBlob.objects.exists())
+
+
+    def test_sweep_keeps_files_stored_again(self):
+        """File referenced again after its deletion was queued is kept"""
+        task = self.create_task('task', b'content')
+        name = task.attachment.name
+        task.delete()
+        self.create_task('again', b'content')
+
+        self.assertEqual(sweep_deletions(), 0)
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(AttachmentDeletion.objects.exists())
+
+
+    def test_file_swept_before_reference_stored_again(self):
+        """File swept after storage skipped writing it is written again by the new task"""
+        task = self.create_task('task', b'content')
+        name = task.attachment.name
+        task.delete()
+
+        acquire = AttachmentBlob.objects.acquire
+        def swept_acquire(*args):
+            sweep_deletions()
+            acquire(*args)
+
+        with mock.patch.object(AttachmentBlob.objects, 'acquire', side_effect=swept_acquire):
+            again = self.create_task('again', b'content')
+
+        self.assertEqual(again.attachment.name, name)
+        with self.storage.open(name, 'rb') as attachment:
+            self.assertEqual(attachment.read(), b'content')
+        self.assertEqual(AttachmentBlob.objects.get().refcount, 1)
+
+
+    def test_user_delete_queues_every_attachment(self):
+        """Deleting a user queues attachments of all their tasks without touching files"""
+        for index in range(3):
+            self.create_task('task'+str(index), b'content '+str(index).encode())
+
+        self.user.delete()
+
+        self.assertEqual(AttachmentDeletion.objects.count(), 3)
+        self.assertEqual(sweep_deletions(batch_size=2), 3)
+
+
+    def test_collect_orphans(self):
+        """Files referenced by no task are collected, referenced ones kept"""
+        task = self.create_task('task', b'content')
+        orphan = self.storage.save('attachments/someone/old-file.txt', ContentFile(b'orphan'))
+
+        self.assertEqual(collect_orphans(min_age=0, dry_run=True), (2, 1, len(b'orphan')))
+        self.assertTrue(self.storage.exists(orphan))
+
+        self.assertEqual(collect_orphans(min_age=0, batch_size=1), (2, 1, len(b'orphan')))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(task.attachment.name))
+
+
+    def test_collect_orphans_keeps_recent_files(self):
+        """Files newer than min_age may belong to uploads in progress and are kept"""
+        orphan = self.storage.save('attachments/someone/new-file.txt', ContentFile(b'orphan'))
+
+        self.assertEqual(collect_orphans(min_age=60*60), (0, 0, 0))
+        self.assertTrue(os.path.exists(self.storage.path(orphan)))
@@ -0,0 +1,172 @@
+"""Module to define test cases for cron jobs."""
+from datetime import date, datetime, timedelta, timezone
+from django.core import mail
+from accounts.models import User
+from api.models import Task, ReminderCheckpoint
+from api.cron import (send_remainders, send_remainders_shard, send_sharded_remainders,
+                      send_hourly_remainders, midnight_zones)
+from outbox.mail import drain
+from utils.setup_test import TestSetUp
+
+
+
+class TestSendRemainders(TestSetUp):
+    """Test cases for daily remainders of tasks due today"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0,
+                                                        microsecond=0)
+
+
+    def create_user(self, name):
+        """Create user with given name"""
+        return User.objects.create_user(username=name, email=name+'@todo.local')
+
+
+    def test_remainders_sent_for_tasks_due_today(self):
+        """Every user with tasks due today gets one email listing them"""
+        first_user = self.create_user('first')
+        second_user = self.create_user('second')
+        third_user = self.create_user('third')
+
+        Task.objects.create(user=first_user, title='today', dueDate=self.today)
+        Task.objects.create(user=first_user, title='also today', dueDate=self.today)
+        Task.objects.create(user=first_user, title='tomorrow',
+                            dueDate=self.today + timedelta(days=1))
+        Task.objects.create(user=second_user, title='today', dueDate=self.today)
+        Task.objects.create(user=third_user, title='yesterday',
+                            dueDate=self.today - timedelta(days=1))
+
+        send_remainders()
+        drain()
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['first@todo.local', 'second@todo.local'])
+        first_message = [message for message in mail.outbox
+                         if message.to == ['first@todo.local']][0]
+        self.assertIn("'Title': 'today'", first_message.body)
+        self.assertIn("'Title': 'also today'", first_message.body)
+        self.assertNotIn('tomorrow', first_message.body)
+
+
+    def test_remainders_query_count_independent_of_users(self):
+        """Tasks and users are fetched in one query and remainders queued in one insert"""
+        for index in range(10):
+            user = self.create_user('user'+str(index))
+            Task.objects.create(user=user, title='today', dueDate=self.today)
+
+        with self.assertNumQueries(2):
+            send_remainders()
+
+        self.assertEqual(mail.outbox, [])
+        drain()
+        self.assertEqual(len(mail.outbox), 10)
+
+
+
+class TestShardedRemainders(TestSetUp):
+    """Test cases for sharded remainders with per shard checkpoints"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0,
+                                                        microsecond=0)
+        self.users = []
+        for index in range(7):
+            user = User.objects.create_user(username='user'+str(index),
+                                            email='user'+str(index)+'@todo.local')
+            Task.objects.create(user=user, title='today', dueDate=self.today)
+            self.users.append(user)
+
+
+    def test_shards_cover_every_user_once(self):
+        """Every user gets exactly one remainder across all shards"""
+        results = send_sharded_remainders(shard_count=3, processes=1)
+        drain()
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         sorted(user.email for user in self.users))
+        self.assertEqual([result['shard'] for result in results], [0, 1, 2])
+        self.assertEqual(sum(result['queued'] for result in results), 7)
+        self.assertEqual(ReminderCheckpoint.objects.filter(finished=True).count(), 3)
+
+
+    def test_finished_shards_are_not_resent(self):
+        """Rerunning a finished day sends nothing"""
+        send_sharded_remainders(shard_count=2, processes=1)
+        drain()
+        mail.outbox.clear()
+
+        results = send_sharded_remainders(shard_count=2, processes=1)
+        drain()
+
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(all(result['skipped'] for result in results))
+
+
+    def test_resume_after_checkpoint(self):
+        """A crashed shard resumes after the last user recorded in its checkpoint"""
+        ReminderCheckpoint.objects.create(run_date=self.today.date(), shard=0, shard_count=1,
+                                          last_user_id=self.users[3].pk, users=4, queued=4)
+
+        result = send_remainders_shard(0, 1)
+        drain()
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         sorted(user.email for user in self.users[4:]))
+        self.assertEqual(result['resumed_after'], self.users[3].pk)
+        checkpoint = ReminderCheckpoint.objects.get(shard=0, shard_count=1)
+        self.assertEqual((checkpoint.queued, checkpoint.last_user_id, checkpoint.finished),
+                         (7, self.users[-1].pk, True))
+
+
+
+class TestHourlyRemainders(TestSetUp):
+    """Test cases for remainders sent at local midnight of users' time zones"""
+
+    def setUp(self):
+        super().setUp()
+        # 19:00 UTC is midnight in Karachi (UTC+5), 15:00 in New York
+        self.now = datetime(2021, 8, 8, 19, 0, tzinfo=timezone.utc)
+        self.utc_user = User.objects.create_user(username='utc', email='utc@todo.local')
+        self.karachi_user = User.objects.create_user(username='karachi',
+                                                     email='karachi@todo.local',
+                                                     timezone='Asia/Karachi')
+        User.objects.create_user(username='newyork', email='newyork@todo.local',
+                                 timezone='America/New_York')
+
+
+    def test_midnight_zones(self):
+        """Only time zones whose day started in the last hour are selected"""
+        self.assertEqual(midnight_zones(self.now), [('Asia/Karachi', date(2021, 8, 9))])
+        self.assertEqual(midnight_zones(self.now + timedelta(minutes=59)),
+                         [('Asia/Karachi', date(2021, 8, 9))])
+        self.assertEqual(midnight_zones(self.now + timedelta(hours=1)), [])
+        self.assertEqual(midnight_zones(datetime(2021, 8, 9, 0, 0, tzinfo=timezone.utc)),
+                         [('UTC', date(2021, 8, 9))])
+
+
+    def test_remainders_for_local_day(self):
+        """Users at local midnight get remainders for tasks due on their local day"""
+        # 9 Aug 04:00 in Karachi, still 8 Aug in UTC
+        Task.objects.create(user=self.karachi_user, title='local today',
+                            dueDate=datetime(2021, 8, 8, 23, 0, tzinfo=timezone.utc))
+        # 8 Aug 23:00 in Karachi
+        Task.objects.create(user=self.karachi_user, title='local yesterday',
+                            dueDate=datetime(2021, 8, 8, 18, 0, tzinfo=timezone.utc))
+        Task.objects.create(user=self.utc_user, title='utc tomorrow',
+                            dueDate=datetime(2021, 8, 9, 10, 0, tzinfo=timezone.utc))
+
+        results = send_hourly_remainders(self.now, shard_count=2, processes=1)
+        drain()
+
+        self.assertEqual([message.to for message in mail.outbox], [['karachi@todo.local']])
+        self.assertIn('local today', mail.outbox[0].body)
+        self.assertNotIn('local yesterday', mail.outbox[0].body)
+        self.assertEqual({result['timezone'] for result in results}, {'Asia/Karachi'})
+
+        mail.outbox.clear()
+        send_hourly_remainders(self.now + timedelta(minutes=30), shard_count=2, processes=1)
+        drain()
+        self.assertEqual(mail.outbox, [])
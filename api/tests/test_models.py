@@ -1,6 +1,14 @@
 """Module to define test cases for API models."""
-from api.models import Task
-from utils.setup_test import TestSetUp
+import os
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from accounts.models import User
+from api.models import Task, UserTaskStats, AttachmentBlob, AttachmentDeletion
+from utils.setup_test import AttachmentTestMixin, TestSetUp
 
 class TestTaskModel(TestSetUp):
     """Testing task model."""
@@ -12,3 +20,176 @@ class TestTaskModel(TestSetUp):
         todo_task = Task(user=user, title='Testing task', dueDate="2021-08-01 16:18:2")
         todo_task.save()
         self.assertEqual(str(todo_task), 'Testing task')
+
+
+    def test_create_task_with_existing_title(self):
+        """Database rejects a second task with the same title for one user."""
+
+        user = self.create_test_user()
+        Task.objects.create(user=user, title='Testing task', dueDate="2021-08-01 16:18:2")
+        with self.assertRaises(IntegrityError):
+            Task.objects.create(user=user, title='Testing task', dueDate="2021-08-01 16:18:2")
+
+
+
+class TestUserTaskStatsModel(TestSetUp):
+    """Testing task stats maintained on task changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+        self.now = datetime(2021, 8, 10, 12, 0, tzinfo=timezone.utc)
+
+
+    def test_stats_updated_on_task_changes(self):
+        """Stats follow task create, update and delete."""
+
+        task = Task.objects.create(user=self.user, title='task', dueDate=self.now)
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.total, stats.completed), (1, 0))
+
+        task = Task.objects.get(pk=task.pk)
+        task.completionStatus = True
+        task.completionDate = self.now + timedelta(days=1)
+        task.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.total, stats.completed, stats.completed_late), (1, 1, 1))
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+        task.delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.total, stats.completed, stats.completed_late), (0, 0, 0))
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+
+    def test_stats_rebuild(self):
+        """Rebuild fixes stats changed behind signals' back."""
+
+        Task.objects.create(user=self.user, title='task', dueDate=self.now,
+                            completionStatus=True, completionDate=self.now)
+        Task.objects.filter(user=self.user).update(completionStatus=False)
+        self.assertIn('completed', UserTaskStats.objects.differences(self.user.pk))
+
+        UserTaskStats.objects.rebuild(self.user.pk)
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+
+
+class TestTaskSaveTransaction(TransactionTestCase):
+    """Testing task saves committed together with their stats."""
+
+    def test_task_not_saved_without_stats(self):
+        """Task is rolled back when updating stats of its user fails."""
+
+        user = User.objects.create_user(username='username', email='user@example.com',
+                                        password='password')
+        with mock.patch.object(UserTaskStats.objects, 'apply_change', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Task.objects.create(user=user, title='task', dueDate="2021-08-01 16:18:2")
+
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(UserTaskStats.objects.get(user=user).total, 0)
+
+
+
+class TestAttachmentBlobModel(AttachmentTestMixin, TestSetUp):
+    """Testing content addressed attachments with reference counts."""
+
+    def test_identical_attachments_stored_once(self):
+        """Tasks with identical attachments share one file and blob."""
+
+        first = self.create_task('first', b'same content')
+        second = self.create_task('second', b'same content')
+
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertTrue(first.attachment.name.startswith('attachments/blobs/'))
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual((blob.name, blob.refcount, blob.size),
+                         (first.attachment.name, 2, len(b'same content')))
+
+
+    def test_uploaded_temporary_file_moved_into_place(self):
+        """Attachment uploaded to a temporary file is moved to storage, not copied."""
+
+        upload = TemporaryUploadedFile('file.txt', 'text/plain', len(b'uploaded'), None)
+        self.addCleanup(upload.close)
+        upload.write(b'uploaded')
+        upload.seek(0)
+        temporary_path = upload.temporary_file_path()
+
+        task = Task.objects.create(user=self.user, title='task', dueDate="2021-08-01 16:18:2",
+                                   attachment=upload)
+
+        self.assertFalse(os.path.exists(temporary_path))
+        with task.attachment.open('rb') as attachment:
+            self.assertEqual(attachment.read(), b'uploaded')
+
+
+    def test_file_queued_for_deletion_with_last_reference(self):
+        """Deleting a task releases its blob, the file is queued with the last task."""
+
+        first = self.create_task('first', b'same content')
+        second = self.create_task('second', b'same content')
+        name = first.attachment.name
+
+        first.delete()
+        self.assertEqual(AttachmentBlob.objects.get().refcount, 1)
+        self.assertFalse(AttachmentDeletion.objects.exists())
+
+        second.delete()
+        # the blob is kept until the sweeper deletes the file
+        self.assertEqual(AttachmentBlob.objects.get().refcount, 0)
+        self.assertEqual(list(AttachmentDeletion.objects.values_list('name', flat=True)), [name])
+        # the file itself is deleted by the sweeper
+        self.assertTrue(self.storage.exists(name))
+
+
+    def test_replaced_attachment_released(self):
+        """Replacing attachment moves the reference to the new blob."""
+
+        task = self.create_task('task', b'old content')
+        old_name = task.attachment.name
+
+        task = Task.objects.get(pk=task.pk)
+        task.attachment = SimpleUploadedFile('file.txt', b'new content')
+        task.save()
+
+        self.assertEqual(dict(AttachmentBlob.objects.values_list('name', 'refcount')),
+                         {task.attachment.name: 1, old_name: 0})
+        with task.attachment.open('rb') as attachment:
+            self.assertEqual(attachment.read(), b'new content')
+        self.assertEqual(list(AttachmentDeletion.objects.values_list('name', flat=True)),
+                         [old_name])
+
+
+    def test_bulk_delete_releases_attachments(self):
+        """Deleting tasks in bulk releases their blobs like deleting one by one."""
+
+        first = self.create_task('first', b'same content')
+        self.create_task('second', b'same content')
+        self.create_task('third', b'other content')
+        name = first.attachment.name
+
+        deleted = Task.objects.bulk_delete(self.user.pk, ['first', 'third', 'missing'])
+
+        self.assertEqual(deleted, {'first', 'third'})
+        self.assertEqual(list(AttachmentBlob.objects.filter(refcount__gt=0)
+                              .values_list('name', 'refcount')), [(name, 1)])
+        self.assertEqual(AttachmentDeletion.objects.count(), 1)
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).total, 1)
+
+
+    def test_bulk_delete_queries_independent_of_task_count(self):
+        """Deleting more tasks in bulk takes no more queries."""
+
+        for index in range(6):
+            self.create_task('task'+str(index), b'content '+str(index).encode())
+
+        with CaptureQueriesContext(connection) as two:
+            Task.objects.bulk_delete(self.user.pk, ['task0', 'task1'])
+        with CaptureQueriesContext(connection) as four:
+            Task.objects.bulk_delete(self.user.pk, ['task2', 'task3', 'task4', 'task5'])
+
+        self.assertEqual(len(two), len(four))
+        self.assertEqual(AttachmentDeletion.objects.count(), 6)
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
@@ -0,0 +1,58 @@
+"""Module to define test cases for report aggregation."""
+from datetime import datetime, timedelta, timezone
+from api.models import Task
+from api import reports
+from utils.setup_test import TestSetUp
+
+
+
+class TestReports(TestSetUp):
+    """Test cases for reports computed with database aggregation"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+        self.now = datetime(2021, 8, 10, 12, 0, tzinfo=timezone.utc)
+        day = timedelta(days=1)
+
+        # completed on time, completed late (twice on 2021-08-05) and not completed
+        Task.objects.create(user=self.user, title='on time', dueDate=self.now,
+                            completionStatus=True, completionDate=self.now - day)
+        Task.objects.create(user=self.user, title='late', dueDate=self.now - 6*day,
+                            completionStatus=True, completionDate=self.now - 5*day)
+        Task.objects.create(user=self.user, title='late again', dueDate=self.now - 7*day,
+                            completionStatus=True, completionDate=self.now - 5*day)
+        Task.objects.create(user=self.user, title='overdue', dueDate=self.now - day)
+        Task.objects.create(user=self.user, title='pending', dueDate=self.now + day)
+
+
+    def test_total_tasks(self):
+        """Count total, completed and remaining tasks"""
+        self.assertEqual(reports.total_tasks(self.user), {'Total Tasks' : 5,
+                                                          'Completed Tasks' : 3,
+                                                          'Remaining Tasks' : 2})
+
+
+    def test_overdue_tasks(self):
+        """Count late completed and past due incomplete tasks"""
+        counts = reports.task_counts(self.user.pk, self.now)
+        self.assertEqual(reports.overdue_tasks(self.user, counts),
+                         {'No. of tasks not completed on time': '3'})
+
+
+    def test_max_date(self):
+        """Return day with most completed tasks"""
+        self.assertEqual(reports.max_date(self.user), {'Maximum tasks completed on': '2021-08-05',
+                                                       'No. of tasks': '2'})
+
+
+    def test_count_opened(self):
+        """Count tasks by weekday of creation"""
+        weekday = reports.WEEKDAYS[datetime.now(timezone.utc).weekday()]
+        self.assertEqual(reports.count_opened(self.user), {weekday: 5})
+
+
+    def test_task_counts_read_stats(self):
+        """Counters come from stats row plus one overdue count"""
+        with self.assertNumQueries(2):
+            reports.task_counts(self.user.pk, self.now)
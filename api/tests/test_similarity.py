@@ -0,0 +1,142 @@
+"""Module to define test cases for similar tasks detection."""
+import random
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from api.models import Task, SimilarTaskPair
+from api.similarity import similar_pairs, jaccard, title_words
+from utils.setup_test import TestSetUp
+
+
+
+def nested_loop_pairs(titles):
+    """Similar tasks as found by the task list before the inverted index: comparing every pair"""
+    pairs = []
+    for i in range(0, len(titles)-1):
+        for j in range(i+1, len(titles)):
+            if len(titles[i]) > len(titles[j]):
+                title1 = titles[j].split(' ')
+                title2 = titles[i].split(' ')
+            else:
+                title1 = titles[i].split(' ')
+                title2 = titles[j].split(' ')
+
+            similarity = True
+            for word in title1:
+                if word not in title2:
+                    similarity = False
+                    break
+
+            if similarity:
+                pairs.append([titles[i], titles[j]])
+    return pairs
+
+
+def random_titles(count, seed=7):
+    """Return distinct titles made of a few common words"""
+    rng = random.Random(seed)
+    words = ['buy', 'milk', 'call', 'mom', 'pay', 'rent', 'gym', 'new', 'task']
+    titles = list({' '.join(rng.sample(words, rng.randint(1, 4))) for _ in range(count)})
+    rng.shuffle(titles)
+    return titles
+
+
+
+class TestSimilarPairs(SimpleTestCase):
+    """Test cases for inverted index similar tasks"""
+
+    def test_similar_pairs(self):
+        """Pairs whose shorter title words are all in the longer title"""
+        titles = ['task', 'new task', 'buy milk', 'milk', 'new']
+        self.assertEqual(similar_pairs(titles),
+                         [['task', 'new task'], ['new task', 'new'], ['buy milk', 'milk']])
+
+
+    def test_similar_pairs_match_nested_loop(self):
+        """Inverted index finds same pairs in same order as the nested loop (no repeated words)"""
+        titles = random_titles(300)
+        self.assertEqual(similar_pairs(titles), nested_loop_pairs(titles))
+
+
+    def test_equal_length_titles_compared_both_ways(self):
+        """Equal length titles are similar when either one's words are all in the other"""
+        # the nested loop only looked for the first title's words in the second,
+        # so whether such pairs were found depended on the order of tasks
+        self.assertEqual(nested_loop_pairs(['a b', 'a a']), [])
+        self.assertEqual(nested_loop_pairs(['a a', 'a b']), [['a a', 'a b']])
+        self.assertEqual(similar_pairs(['a b', 'a a']), [['a b', 'a a']])
+        self.assertEqual(similar_pairs(['a a', 'a b']), [['a a', 'a b']])
+
+
+    def test_jaccard_pairs(self):
+        """Jaccard mode finds every pair above threshold"""
+        titles = random_titles(300)
+        expected = [[titles[i], titles[j]] for i in range(len(titles))
+                    for j in range(i+1, len(titles))
+                    if jaccard(title_words(titles[i]), title_words(titles[j])) >= 0.6]
+        self.assertEqual(similar_pairs(titles, 'jaccard', threshold=0.6), expected)
+
+
+    def test_minhash_pairs(self):
+        """MinHash mode only returns pairs above threshold and finds identical word sets"""
+        titles = random_titles(300) + ['pay rent now', 'now pay rent']
+        pairs = similar_pairs(titles, 'minhash', threshold=0.6)
+        for title, other_title in pairs:
+            self.assertGreaterEqual(jaccard(title_words(title), title_words(other_title)), 0.6)
+        self.assertIn(['pay rent now', 'now pay rent'], pairs)
+
+
+
+class TestSimilarTaskPairModel(TestSetUp):
+    """Testing similar task pairs maintained on task changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+
+
+    def test_pairs_follow_task_changes(self):
+        """Pairs are added on create, recomputed on retitle and removed on delete"""
+        Task.objects.create(user=self.user, title='task', dueDate='2021-08-01 10:00:00')
+        task = Task.objects.create(user=self.user, title='new task', dueDate='2021-08-02 10:00:00')
+        self.assertEqual(SimilarTaskPair.objects.pairs_for_user(self.user.pk),
+                         [['task', 'new task']])
+
+        task = Task.objects.get(pk=task.pk)
+        task.title = 'buy milk'
+        task.save()
+        self.assertEqual(SimilarTaskPair.objects.pairs_for_user(self.user.pk), [])
+
+        Task.objects.create(user=self.user, title='milk', dueDate='2021-08-03 10:00:00')
+        self.assertEqual(SimilarTaskPair.objects.pairs_for_user(self.user.pk),
+                         [['buy milk', 'milk']])
+
+        task.delete()
+        self.assertEqual(SimilarTaskPair.objects.pairs_for_user(self.user.pk), [])
+
+
+    def assert_rebuild_matches_incremental(self):
+        """Assert rebuilding pairs gives the pairs maintained incrementally"""
+        for index, title in enumerate(random_titles(40, seed=3)):
+            Task.objects.create(user=self.user, title=title,
+                                dueDate='2021-08-01 10:00:{:02d}'.format(index))
+
+        incremental = SimilarTaskPair.objects.pairs_for_user(self.user.pk)
+        SimilarTaskPair.objects.rebuild(self.user.pk)
+        self.assertEqual(SimilarTaskPair.objects.pairs_for_user(self.user.pk), incremental)
+        return incremental
+
+
+    @override_settings(SIMILAR_TASKS_MODE='jaccard', SIMILAR_TASKS_THRESHOLD=0.5)
+    def test_rebuild_matches_incremental(self):
+        """Rebuilding pairs gives the pairs maintained incrementally"""
+        self.assert_rebuild_matches_incremental()
+
+
+    @override_settings(SIMILAR_TASKS_MODE='minhash', SIMILAR_TASKS_THRESHOLD=0.3,
+                       SIMILAR_TASKS_MINHASH_PERMUTATIONS=4, SIMILAR_TASKS_MINHASH_BANDS=1)
+    def test_minhash_rebuild_matches_incremental(self):
+        """MinHash pairs maintained per task miss the pairs a rebuild misses"""
+        pairs = self.assert_rebuild_matches_incremental()
+        # with a single band of 4 rows LSH misses some pairs above threshold
+        exact = similar_pairs(random_titles(40, seed=3), 'jaccard', threshold=0.3)
+        self.assertLess(len(pairs), len(exact))
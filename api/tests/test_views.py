@@ -1,7 +1,13 @@
 """Module to define test cases for API views."""
-from django.test.utils import override_settings
+import hashlib
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.db import connection
 from django.conf import settings
-from api.models import Task
+from accounts.models import User
+from api.models import Task, UserTaskStats
+from api.report_cache import get_report
 from utils.setup_test import TestSetUp
 
 
@@ -91,7 +97,7 @@ class TestTaskCreateView(TestSetUp):
 
 
     def test_task_create_without_attachment(self):
-        """Task cannot be created without attachment"""
+        """Task can be created without attachment"""
         del self.task_data['attachment']
         self.create_test_user()
 
@@ -101,7 +107,7 @@ class TestTaskCreateView(TestSetUp):
         res = self.client.post(self.task_create_url, self.task_data,
                                **{'HTTP_AUTHORIZATION':'token '+token})
 
-        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.status_code, 201)
 
 
     def test_task_create_without_completion_date(self):
@@ -199,6 +205,53 @@ class TestTaskCreateView(TestSetUp):
         self.assertEqual(res.status_code, 403)
 
 
+    @override_settings(MAX_TASKS_PER_USER=1)
+    def test_task_create_upto_configured_limit(self):
+        """Tasks cannot exceed MAX_TASKS_PER_USER per user"""
+        self.create_test_user()
+
+        token = self.client.post(self.login_url, self.user_login_data,
+                                format="json").data['token']
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+
+        res = self.client.post(self.task_create_url, self.task_data2,
+                               **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(res.data['error'],
+                         "Can't add more tasks, you have reached maximum limit of 1.")
+
+
+    def test_task_create_queries_independent_of_task_count(self):
+        """Task creation cost does not grow with number of existing tasks"""
+        user = self.create_test_user()
+
+        token = self.client.post(self.login_url, self.user_login_data,
+                                format="json").data['token']
+        # authenticate once, so both measured requests find the cached user
+        self.client.get(self.task_list_url, **{'HTTP_AUTHORIZATION':'token '+token})
+
+        with CaptureQueriesContext(connection) as first:
+            self.client.post(self.task_create_url, self.task_data,
+                             **{'HTTP_AUTHORIZATION':'token '+token})
+
+        Task.objects.bulk_create([Task(user=user, title=str(i), dueDate='2021-08-08 12:23:28')
+                                  for i in range(20)])
+
+        # same kind of task as the first one: completed tasks also count
+        # their (here new) completion day in the user's stats
+        self.task_data.update(title='another title', completionDate='2021-08-6 12:23:28',
+                              attachment=open('media_cdn/emumba logo.jpg', 'rb'))
+        with CaptureQueriesContext(connection) as second:
+            res = self.client.post(self.task_create_url, self.task_data,
+                                   **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(len(first.captured_queries), len(second.captured_queries))
+
+
 
 class TestTaskUpdateView(TestSetUp):
     """Test cases for Task update view"""
@@ -330,7 +383,7 @@ class TestTaskUpdateView(TestSetUp):
 
 
     def test_task_update_without_attachment(self):
-        """Task cannot be updated if attachment is missing in updated data"""
+        """Task keeps its attachment if attachment is missing in updated data"""
         del self.task_update_data['attachment']
         self.create_test_user()
 
@@ -343,7 +396,8 @@ class TestTaskUpdateView(TestSetUp):
         res = self.client.put('/api/task-update/'+self.task_data['title']+'/',
                               self.task_update_data, **{'HTTP_AUTHORIZATION':'token '+token})
 
-        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(Task.objects.get().attachment)
 
 
     def test_task_update_without_compltion_status(self):
@@ -399,6 +453,310 @@ class TestTaskUpdateView(TestSetUp):
 
 
 
+class TestTaskJsonAndPatch(TestSetUp):
+    """Test cases for JSON task requests and partial task updates"""
+
+    def setUp(self):
+        super().setUp()
+        self.header = self.login()
+        self.client.post(self.task_create_url, self.task_data, **self.header)
+        self.url = '/api/task-update/'+self.task_data['title']+'/'
+
+
+    def test_task_create_with_json(self):
+        """Task can be created from a JSON body"""
+        res = self.client.post(self.task_create_url,
+                               {'title': 'json task', 'dueDate': '2021-08-08T12:23:28Z',
+                                'completionStatus': True}, format="json", **self.header)
+
+        self.assertEqual(res.status_code, 201)
+        task = Task.objects.get(title='json task')
+        self.assertTrue(task.completionStatus)
+        self.assertIsNotNone(task.completionDate)
+        self.assertFalse(task.attachment)
+
+
+    def test_task_update_with_json(self):
+        """Task can be updated from a JSON body keeping its attachment"""
+        attachment = Task.objects.get().attachment.name
+        res = self.client.put(self.url, {'title': 'json title', 'dueDate': '2021-08-09T12:23:28Z'},
+                              format="json", **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        task = Task.objects.get()
+        self.assertEqual((task.title, task.attachment.name), ('json title', attachment))
+
+
+    def test_task_patch_writes_changed_columns(self):
+        """PATCH updates only the given fields, writing only the title column"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(self.url, {'title': 'patched'}, format="json",
+                                    **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['title'], 'patched')
+        task = Task.objects.get()
+        self.assertEqual((task.title, task.description), ('patched', self.task_data['description']))
+        self.assertTrue(task.attachment)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "api_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+
+
+    def test_task_patch_unchanged_task(self):
+        """PATCH with unchanged values does not write the task"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(self.url, {'description': self.task_data['description']},
+                                    format="json", **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('UPDATE "api_task"')])
+
+
+    def test_task_patch_completion_status(self):
+        """Completing a task by PATCH sets its completion date and stats"""
+        self.client.put(self.url, self.task_update_data, **self.header)
+        url = '/api/task-update/'+self.task_update_data['title']+'/'
+
+        res = self.client.patch(url, {'completionStatus': True}, format="json", **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNotNone(Task.objects.get().completionDate)
+        self.assertEqual(UserTaskStats.objects.differences(Task.objects.get().user_id), {})
+
+
+    def test_task_update_keeps_completion_date(self):
+        """PUT without completionStatus keeps completion date of a completed task"""
+        Task.objects.update(completionDate='2021-07-01 10:00:00+00:00')
+        data = {'title': self.task_data['title'], 'dueDate': '2021-08-09T12:23:28Z'}
+
+        res = self.client.put(self.url, data, format="json", **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        task = Task.objects.get()
+        self.assertTrue(task.completionStatus)
+        self.assertEqual(task.completionDate.date().isoformat(), '2021-07-01')
+
+
+    def test_task_requests_with_json_array(self):
+        """Task create, update and patch reject a JSON body which is not an object"""
+        body = [{'title': 'json task'}]
+        create = self.client.post(self.task_create_url, body, format="json", **self.header)
+        update = self.client.put(self.url, body, format="json", **self.header)
+        patch = self.client.patch(self.url, body, format="json", **self.header)
+
+        self.assertEqual((create.status_code, update.status_code, patch.status_code),
+                         (400, 400, 400))
+
+
+    def test_task_patch_errors(self):
+        """PATCH of a missing task, to a taken title or with invalid data fails"""
+        self.client.post(self.task_create_url, self.task_data2, **self.header)
+
+        missing = self.client.patch('/api/task-update/missing/', {'title': 'x'}, format="json",
+                                    **self.header)
+        taken = self.client.patch(self.url, {'title': self.task_data2['title']}, format="json",
+                                  **self.header)
+        invalid = self.client.patch(self.url, {'dueDate': 'not a date'}, format="json",
+                                    **self.header)
+
+        self.assertEqual((missing.status_code, taken.status_code, invalid.status_code),
+                         (404, 409, 400))
+
+
+
+
+class TestTaskAttachmentUpload(TestSetUp):
+    """Test cases for streamed attachment uploads of task create and update views"""
+
+    def setUp(self):
+        super().setUp()
+        with open('media_cdn/emumba logo.jpg', 'rb') as attachment:
+            content = attachment.read()
+        self.attachment_hash = hashlib.sha256(content).hexdigest()
+        self.attachment_size = len(content)
+
+
+    def test_create_stores_hash_and_size(self):
+        """Hash and size of attachment are computed while it is uploaded"""
+        res = self.client.post(self.task_create_url, self.task_data, **self.login())
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['attachment_hash'], self.attachment_hash)
+        self.assertEqual(res.data['attachment_size'], self.attachment_size)
+
+
+    def test_update_with_identical_attachment_keeps_file(self):
+        """Identical attachment is not written again on update"""
+        header = self.login()
+        self.client.post(self.task_create_url, self.task_data, **header)
+        stored_name = Task.objects.get().attachment.name
+
+        res = self.client.put('/api/task-update/'+self.task_data['title']+'/',
+                              self.task_update_data, **header)
+
+        self.assertEqual(res.status_code, 200)
+        task = Task.objects.get()
+        self.assertEqual(task.attachment.name, stored_name)
+        self.assertEqual(task.attachment_hash, self.attachment_hash)
+
+
+    def test_update_with_changed_attachment_rewrites_file(self):
+        """Changed attachment is stored with its new hash"""
+        header = self.login()
+        self.client.post(self.task_create_url, self.task_data, **header)
+        self.task_update_data['attachment'] = SimpleUploadedFile('notes.txt', b'new content')
+
+        res = self.client.put('/api/task-update/'+self.task_data['title']+'/',
+                              self.task_update_data, **header)
+
+        self.assertEqual(res.status_code, 200)
+        task = Task.objects.get()
+        self.assertTrue(task.attachment.name.endswith('.txt'))
+        self.assertEqual(task.attachment_hash, hashlib.sha256(b'new content').hexdigest())
+        self.assertEqual(task.attachment_size, len(b'new content'))
+
+
+    def test_attachment_over_size_limit(self):
+        """Attachment over ATTACHMENT_MAX_SIZE is rejected"""
+        with override_settings(ATTACHMENT_MAX_SIZE=self.attachment_size - 1):
+            res = self.client.post(self.task_create_url, self.task_data, **self.login())
+
+        self.assertEqual(res.status_code, 413)
+        self.assertFalse(Task.objects.exists())
+
+
+    def test_attachment_over_user_quota(self):
+        """Attachment taking user's attachments over ATTACHMENT_USER_QUOTA is rejected"""
+        header = self.login()
+        with override_settings(ATTACHMENT_USER_QUOTA=self.attachment_size * 3 // 2):
+            first = self.client.post(self.task_create_url, self.task_data, **header)
+            second = self.client.post(self.task_create_url, self.task_data2, **header)
+            update = self.client.put('/api/task-update/'+self.task_data['title']+'/',
+                                     self.task_update_data, **header)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 413)
+        self.assertIn('quota', second.data['error'])
+        # replacing the attachment of a task does not count its old attachment
+        self.assertEqual(update.status_code, 200)
+
+
+
+class TestTaskBulkView(TestSetUp):
+    """Test cases for bulk task create, update and delete view"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-bulk')
+        self.header = self.login()
+
+
+    def tasks(self, count, start=0):
+        """Return JSON data of count tasks"""
+        return [{'title': 'task '+str(number), 'description': 'task number '+str(number),
+                 'dueDate': '2021-08-08T12:23:28Z', 'completionStatus': False}
+                for number in range(start, start+count)]
+
+
+    def test_bulk_without_token(self):
+        """User must authorize itself to change tasks in bulk"""
+        res = self.client.post(self.url, self.tasks(1), format="json")
+        self.assertEqual(res.status_code, 401)
+
+
+    def test_bulk_create_not_a_list(self):
+        """Request body must be a JSON array"""
+        res = self.client.post(self.url, self.tasks(1)[0], format="json", **self.header)
+        self.assertEqual(res.status_code, 400)
+
+
+    @override_settings(MAX_TASKS_PER_USER=100)
+    def test_bulk_create(self):
+        """Valid tasks are created with a constant number of queries"""
+        self.client.get(self.task_list_url, **self.header)
+        with CaptureQueriesContext(connection) as few_queries:
+            self.client.post(self.url, self.tasks(5), format="json", **self.header)
+        with CaptureQueriesContext(connection) as many_queries:
+            res = self.client.post(self.url, self.tasks(50, start=5), format="json",
+                                   **self.header)
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual([item['status'] for item in res.data], [201]*50)
+        self.assertEqual(res.data[0]['task']['title'], 'task 5')
+        self.assertEqual(len(many_queries), len(few_queries))
+
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).total, 55)
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+
+    def test_bulk_create_mixed_results(self):
+        """Invalid and duplicate items fail alone with a multi status response"""
+        self.client.post(self.url, self.tasks(1), format="json", **self.header)
+        tasks = self.tasks(2) + [{'description': 'no title'}, self.tasks(1, start=5)[0]]
+
+        res = self.client.post(self.url, tasks, format="json", **self.header)
+
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual([item['status'] for item in res.data], [409, 201, 400, 201])
+        self.assertIn('title', res.data[2]['error'])
+        self.assertEqual(sorted(Task.objects.filter(user=self.user).values_list('title', flat=True)),
+                         ['task 0', 'task 1', 'task 5'])
+
+
+    @override_settings(MAX_TASKS_PER_USER=3)
+    def test_bulk_create_over_limit(self):
+        """Items over maximum tasks limit are rejected"""
+        self.client.post(self.url, self.tasks(1), format="json", **self.header)
+        res = self.client.post(self.url, self.tasks(3, start=1), format="json", **self.header)
+
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual([item['status'] for item in res.data], [201, 201, 403])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 3)
+
+
+    def test_bulk_update(self):
+        """Tasks found by title are partially updated"""
+        self.client.post(self.url, self.tasks(3), format="json", **self.header)
+        changes = [{'title': 'task 0', 'completionStatus': True},
+                   {'title': 'task 1', 'description': 'changed'},
+                   {'title': 'missing', 'description': 'changed'},
+                   {'title': 'task 2', 'dueDate': 'not a date'},
+                   {'title': ['task 2'], 'description': 'changed'}, 'task 2']
+
+        res = self.client.put(self.url, changes, format="json", **self.header)
+
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual([item['status'] for item in res.data], [200, 200, 404, 400, 400, 400])
+        completed = Task.objects.get(user=self.user, title='task 0')
+        self.assertTrue(completed.completionStatus)
+        self.assertIsNotNone(completed.completionDate)
+        self.assertEqual(Task.objects.get(user=self.user, title='task 1').description, 'changed')
+        self.assertEqual(Task.objects.get(user=self.user, title='task 2').dueDate.day, 8)
+
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).completed, 1)
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+
+    def test_bulk_delete(self):
+        """Tasks with given titles are deleted in one request"""
+        self.client.post(self.url, self.tasks(3), format="json", **self.header)
+        res = self.client.delete(self.url, ['task 0', 'task 2', 'missing'], format="json",
+                                 **self.header)
+
+        self.assertEqual(res.status_code, 207)
+        self.assertEqual([item['status'] for item in res.data], [200, 200, 404])
+        self.assertEqual(list(Task.objects.filter(user=self.user).values_list('title', flat=True)),
+                         ['task 1'])
+
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).total, 1)
+        self.assertEqual(UserTaskStats.objects.differences(self.user.pk), {})
+
+
+
 class TestTaskDeleteView(TestSetUp):
     """Test cases for task delete view"""
 
@@ -528,6 +886,62 @@ class TestTaskListView(TestSetUp):
         self.assertEqual(res.status_code, 200)
 
 
+    def test_task_list_with_fields(self):
+        """Return only requested fields of tasks"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+
+        res = self.client.get(self.task_list_url, {'fields': 'title,dueDate'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.data[0]), {'title', 'dueDate'})
+
+
+    def test_task_list_with_invalid_fields(self):
+        """Return 400 if requested fields does not exist"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        res = self.client.get(self.task_list_url, {'fields': 'title,password'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+        self.assertEqual(res.status_code, 400)
+
+
+    def test_task_list_with_cursor_pagination(self):
+        """Return tasks page by page following next cursor"""
+        user = self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+
+        Task.objects.bulk_create([Task(user=user, title=str(i), dueDate='2021-08-08 12:23:28',
+                                       completionStatus=i%2==0) for i in range(5)])
+
+        titles = []
+        res = self.client.get(self.task_list_url, {'page_size': 2, 'fields': 'title'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+
+        while True:
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(res.data['results']), 2)
+            titles += [task['title'] for task in res.data['results']]
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'], **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(titles, ['1', '3', '0', '2', '4'])
+
+
+    def test_task_list_with_invalid_cursor(self):
+        """Return 404 if cursor is invalid"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        res = self.client.get(self.task_list_url, {'cursor': 'abc'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+        self.assertEqual(res.status_code, 404)
+
+
 
 class TestTaskDetailView(TestSetUp):
     """Test cases for task detail view"""
@@ -579,6 +993,99 @@ class TestTaskDetailView(TestSetUp):
 
 
 
+class TestTaskAttachmentView(TestSetUp):
+    """Test cases for task attachment download view"""
+
+    def setUp(self):
+        super().setUp()
+        with open('media_cdn/emumba logo.jpg', 'rb') as attachment:
+            self.content = attachment.read()
+
+        self.header = self.login()
+        self.client.post(self.task_create_url, self.task_data, **self.header)
+        self.url = reverse('task-attachment', args=[self.task_data['title']])
+
+
+    def test_attachment_without_token(self):
+        """User must authorize itself to download attachment"""
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 401)
+
+
+    def test_attachment_of_missing_task(self):
+        """Attachment of a task that does not exist is not found"""
+        res = self.client.get(reverse('task-attachment', args=['missing']), **self.header)
+        self.assertEqual(res.status_code, 404)
+
+
+    def test_attachment_download(self):
+        """Whole attachment is streamed with its ETag"""
+        res = self.client.get(self.url, **self.header)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), self.content)
+        self.assertEqual(res['Content-Length'], str(len(self.content)))
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('abc.jpg', res['Content-Disposition'])
+        self.assertEqual(res['ETag'], '"'+hashlib.sha256(self.content).hexdigest()+'"')
+
+
+    def test_attachment_range(self):
+        """Byte ranges are answered with partial content"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19', **self.header)
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), self.content[10:20])
+        self.assertEqual(res['Content-Range'], 'bytes 10-19/'+str(len(self.content)))
+        self.assertEqual(res['Content-Length'], '10')
+
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-5', **self.header)
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), self.content[-5:])
+
+
+    def test_attachment_range_not_satisfiable(self):
+        """Range starting after the end of file is rejected"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes='+str(len(self.content))+'-',
+                              **self.header)
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */'+str(len(self.content)))
+
+
+    def test_attachment_not_modified(self):
+        """Matching If-None-Match is answered without the file"""
+        etag = self.client.get(self.url, **self.header)['ETag']
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+        self.assertEqual(res.status_code, 304)
+
+
+    @override_settings(ATTACHMENT_ACCEL_REDIRECT='/protected-media/')
+    def test_attachment_accel_redirect(self):
+        """Web server sends the file when ATTACHMENT_ACCEL_REDIRECT is set"""
+        res = self.client.get(self.url, **self.header)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/protected-media/'+Task.objects.get().attachment.name)
+
+
+    def test_attachment_filename_escaped(self):
+        """Quotes, line breaks and non-ASCII characters of title are escaped in filename"""
+        for title, disposition in (
+                ('say "hi"', 'attachment; filename="say \\"hi\\".jpg"'),
+                ('a\r\nX-Injected: 1', "attachment; filename*=utf-8''a%0D%0AX-Injected%3A%201.jpg"),
+                ('café', "attachment; filename*=utf-8''caf%C3%A9.jpg")):
+            Task.objects.update(title=title)
+            url = reverse('task-attachment', args=[title])
+            res = self.client.get(url, **self.header)
+            self.assertEqual(res['Content-Disposition'], disposition)
+            self.assertNotIn('X-Injected', res)
+            with override_settings(ATTACHMENT_ACCEL_REDIRECT='/protected-media/'):
+                res = self.client.get(url, **self.header)
+            self.assertEqual(res['Content-Disposition'], disposition)
+
+
+
 @override_settings(CACHES=settings.TEST_CACHES)
 class TestTotalTasksView(TestSetUp):
     """Test cases for total tasks view"""
@@ -862,6 +1369,111 @@ class TestCountOpenedView(TestSetUp):
 
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'report-cache'}})
+class TestReportCacheInvalidation(TestSetUp):
+    """Test cases for cached reports invalidation on task changes"""
+
+    def test_report_cache_invalidated_on_task_create(self):
+        """Cached report is refreshed after a task is created"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+        self.client.get(self.total_tasks_report_url, **{'HTTP_AUTHORIZATION':'token '+token})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.task_create_url, self.task_data2,
+                             **{'HTTP_AUTHORIZATION':'token '+token})
+        res = self.client.get(self.total_tasks_report_url, **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.data['Total Tasks'], 2)
+
+
+    def test_report_cache_invalidated_on_task_delete(self):
+        """Cached report is refreshed after a task is deleted"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+        self.client.get(self.report_summary_url, **{'HTTP_AUTHORIZATION':'token '+token})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/task-delete/abc/', **{'HTTP_AUTHORIZATION':'token '+token})
+        res = self.client.get(self.report_summary_url, **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.data['total-tasks']['Total Tasks'], 0)
+
+
+    def test_report_cache_invalidated_after_commit(self):
+        """Cached report is kept until the task change is committed"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        self.client.get(self.total_tasks_report_url, **{'HTTP_AUTHORIZATION':'token '+token})
+        user_id = User.objects.get().pk
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.task_create_url, self.task_data,
+                             **{'HTTP_AUTHORIZATION':'token '+token})
+        # a report read before the commit finds the old cached report
+        self.assertEqual(get_report(user_id, 'TotalTasks')['Total Tasks'], 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(get_report(user_id, 'TotalTasks'))
+
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class TestReportSummaryView(TestSetUp):
+    """Test cases for report summary view"""
+
+    def test_report_summary_without_token(self):
+        """User must provide a unique token to access report summary"""
+        res = self.client.get(self.report_summary_url)
+        self.assertEqual(res.status_code, 401)
+
+
+    def test_report_summary_with_existing_tasks(self):
+        """Return all reports in one response"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+
+        res = self.client.get(self.report_summary_url, **{'HTTP_AUTHORIZATION':'token '+token})
+        total_tasks = self.client.get(self.total_tasks_report_url,
+                                      **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.data), {'total-tasks', 'average-completed', 'overdue-tasks',
+                                         'max-date', 'count-opened'})
+        self.assertEqual(res.data['total-tasks'], total_tasks.data)
+
+
+    def test_report_summary_with_include(self):
+        """Return only included reports"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        res = self.client.get(self.report_summary_url, {'include': 'max-date,total-tasks'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.data), {'max-date', 'total-tasks'})
+
+
+    def test_report_summary_with_invalid_include(self):
+        """Return 400 if included report does not exist"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        res = self.client.get(self.report_summary_url, {'include': 'max-date,similar-tasks'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+        self.assertEqual(res.status_code, 400)
+
+
+
 
 class TestSimilarTasksViews(TestSetUp):
     """Test cases for similar tasks view"""
@@ -947,3 +1559,32 @@ class TestSimilarTasksViews(TestSetUp):
                               **{'HTTP_AUTHORIZATION':'token '+token})
 
         self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['List of similar tasks'], [['new task', 'task']])
+
+
+    def test_similar_tasks_with_mode(self):
+        """Return similar tasks computed in requested mode"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        self.task_data['title'] = 'pay rent now'
+        self.task_data2['title'] = 'pay rent'
+
+        self.client.post(self.task_create_url, self.task_data,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.client.post(self.task_create_url, self.task_data2,
+                         **{'HTTP_AUTHORIZATION':'token '+token})
+
+        res = self.client.get(self.similar_tasks_url, {'mode': 'jaccard'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+
+        self.assertEqual(res.status_code, 201)
+
+
+    def test_similar_tasks_with_invalid_mode(self):
+        """Return 400 if similarity mode does not exist"""
+        self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data, format="json").data['token']
+        res = self.client.get(self.similar_tasks_url, {'mode': 'cosine'},
+                              **{'HTTP_AUTHORIZATION':'token '+token})
+        self.assertEqual(res.status_code, 400)
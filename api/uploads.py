@@ -0,0 +1,73 @@
+"""Module to stream task attachments to disk while hashing them"""
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .models import Task
+
+
+class UploadLimitExceeded(APIException):
+    """Raised while receiving an attachment over the size limit or user's quota"""
+
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Attachment is too large.'
+    default_code = 'upload_limit_exceeded'
+
+
+class AttachmentUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler writing each received chunk straight to a temporary
+    file on disk (never buffering the file in memory), computing its
+    sha256 on the fly and stopping the upload as soon as the file goes
+    over ATTACHMENT_MAX_SIZE or the space left in the user's quota.
+    """
+
+    def __init__(self, request=None, user_id=None, exclude_title=None):
+        super().__init__(request)
+        self.user_id = user_id
+        self.exclude_title = exclude_title
+        self.sha256 = None
+        self.limit = None
+        self.limit_reason = None
+
+    def new_file(self, *args, **kwargs):
+        """Start hashing new file and compute how many bytes it may take"""
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.limit = settings.ATTACHMENT_MAX_SIZE
+        self.limit_reason = 'Attachment exceeds the limit of {} bytes.'.format(self.limit)
+
+        if self.user_id is not None:
+            left = (settings.ATTACHMENT_USER_QUOTA
+                    - Task.objects.attachment_usage(self.user_id, self.exclude_title))
+            if left < self.limit:
+                self.limit = max(left, 0)
+                self.limit_reason = ('Attachment exceeds your storage quota ({} bytes left).'
+                                     .format(self.limit))
+
+    def receive_data_chunk(self, raw_data, start):
+        """Hash chunk and write it to disk, unless it takes file over the limit"""
+        if start + len(raw_data) > self.limit:
+            self.file.close()
+            raise UploadLimitExceeded(self.limit_reason)
+
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Return uploaded file with its sha256 hex digest set"""
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.sha256 = self.sha256.hexdigest()
+        return uploaded_file
+
+
+def attachment_digest(uploaded_file):
+    """Return sha256 hex digest of uploaded file, computed while it was received if possible"""
+    digest = getattr(uploaded_file, 'sha256', None)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+    return digest
@@ -8,6 +8,8 @@ urlpatterns = [
 	path('task-detail/<str:title>/', views.TaskDetail.as_view(), name="task-detail"),
 	path('task-update/<str:title>/', views.TaskUpdate.as_view(), name="task-update"),
 	path('task-delete/<str:title>/', views.TaskDelete.as_view(), name="task-delete"),
+	path('task-attachment/<str:title>/', views.TaskAttachment.as_view(), name="task-attachment"),
+	path('tasks/bulk/', views.TaskBulk.as_view(), name="task-bulk"),
 
 	# paths for reports generation
 	path('reports/total-tasks/', views.TotalTasks.as_view(), name="total-tasks"),
@@ -15,6 +17,7 @@ urlpatterns = [
 	path('reports/overdue-tasks/', views.OverdueTasks.as_view(), name="overdue-tasks"),
 	path('reports/max-date/', views.MaxDate.as_view(), name="max-date"),
 	path('reports/count-opened/', views.CountOpened.as_view(), name="count-opened"),
+	path('reports/summary/', views.ReportSummary.as_view(), name="report-summary"),
 
 	#path for algorithm
 	path('reports/similar-tasks/', views.SimilarTasks.as_view(), name="similar-tasks"),
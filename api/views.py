@@ -1,154 +1,266 @@
 """Module to define views for API."""
 
 #from rest_framework.views import APIView
-from datetime import datetime, timezone
+from datetime import datetime
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated # , AllowAny
-from rest_framework.parsers import MultiPartParser
+from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework.exceptions import APIException
 from rest_framework.generics import GenericAPIView
 from rest_framework import status
-from django.core.cache import cache
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .serializers import TaskSerializer
-from .models import Task
+from .pagination import TaskCursorPagination
+from .uploads import AttachmentUploadHandler, UploadLimitExceeded, attachment_digest
+from .downloads import attachment_response, attachment_filename
+from .models import Task, SimilarTaskPair
+from . import reports
+from .report_cache import get_report, set_report
+from .similarity import similar_pairs, SIMILARITY_MODES
 
 
 # Core Operations
 
-class TaskCreate(GenericAPIView):
+def use_attachment_upload_handler(request, exclude_title=None):
+    """
+    Stream attachment of authenticated user's request through
+    AttachmentUploadHandler (must run before request data is read).
+    """
+    request._request.upload_handlers = [
+        AttachmentUploadHandler(request._request, request.user.pk, exclude_title)]
+
+
+def task_data(request):
+    """
+    Return request data as a plain dict which views can change
+    (form data without files is parsed into an immutable QueryDict).
+    """
+    if hasattr(request.data, 'dict'):
+        return request.data.dict()
+    return dict(request.data)
+
+
+def completion_defaults(data):
+    """
+    Normalize completionStatus of task data (form string or JSON boolean)
+    and set completion date of a task completed without one.
+    """
+    if 'completionStatus' in data:
+        data['completionStatus'] = str(data['completionStatus']).lower()
+
+        if data['completionStatus'] == 'true' and 'completionDate' not in data:
+            data['completionDate'] = datetime.utcnow()
+    return data
+
+
+class MultiPartSchemaMixin:
+    """
+    Document a view taking multipart form data or JSON as multipart only,
+    so swagger can show the attachment upload (it cannot show both).
+    """
+
+    def get_parsers(self):
+        """Return multipart parser only while swagger inspects the view"""
+        if getattr(self, 'swagger_fake_view', False):
+            return [MultiPartParser()]
+        return super().get_parsers()
+
+
+class TaskCreate(MultiPartSchemaMixin, GenericAPIView):
     """
     An API view to create a task in user's todo list.
     Takes Token in headers and Title, Description, DueDate,
-    Attachment, CompletionStatus, CompletionDate in body.
-    Creates task in user's todo list (upto 50 tasks per user)
+    Attachment (optional), CompletionStatus, CompletionDate in body,
+    as multipart form data or JSON (without attachment).
+    Creates task in user's todo list (upto MAX_TASKS_PER_USER tasks per user)
     and return task details in json format.
     """
 
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
-    parser_classes = [MultiPartParser]
+    parser_classes = [MultiPartParser, JSONParser]
 
     attachment_parameter_config = openapi.Parameter(
     	'attachment', in_=openapi.IN_FORM, description='Description',
-    	type=openapi.TYPE_FILE, required=True)
+    	type=openapi.TYPE_FILE, required=False)
+
+    def initial(self, request, *args, **kwargs):
+        """Stream the attachment to disk once the user is authenticated"""
+        super().initial(request, *args, **kwargs)
+        use_attachment_upload_handler(request)
 
     @swagger_auto_schema(manual_parameters=[attachment_parameter_config])
     def post(self, request):
         """POST method to receive data, validate it and create new task."""
 
         try:
+            if not isinstance(request.data, dict):
+                return Response({'error': 'expected a JSON object or form data'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
             user_id = self.request.user.pk
             task = Task(user_id=user_id)
-            queryset = Task.objects.filter(user_id=user_id)
-
-            if ('title' not in request.data or
-                'dueDate' not in request.data or
-                'attachment' not in request.data):
 
+            if 'title' not in request.data or 'dueDate' not in request.data:
                 return Response({'error': 'missing required field(s)'},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            if len(queryset) > 49:
-                raise OverflowError("Can't add more tasks, you have reached maximum limit of 50.")
-
-            for query in queryset:
-                if query.title==request.data['title']:
-                    raise ValueError('Task with this title already exists')
-                    break
-
-            if 'completionStatus' in request.data:
-                request.data['completionStatus'] = request.data['completionStatus'].lower()
+            counts = Task.objects.validation_counts(user_id, request.data['title'])
+            if counts['total'] >= settings.MAX_TASKS_PER_USER:
+                raise OverflowError("Can't add more tasks, you have reached maximum limit of "
+                                    + str(settings.MAX_TASKS_PER_USER) + ".")
 
-                if (request.data['completionStatus'] == 'true' and
-                    'completionDate' not in request.data):
+            if counts['taken']:
+                raise ValueError('Task with this title already exists')
 
-                    request.data['completionDate'] = datetime.utcnow()
+            data = completion_defaults(task_data(request))
 
-
-            request.data['user'] = user_id
-            serializer = TaskSerializer(task, data=request.data)
+            data['user'] = user_id
+            serializer = TaskSerializer(task, data=data)
             serializer.is_valid(raise_exception=True)
             task = serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+        except UploadLimitExceeded as error:
+            return Response({'error': str(error.detail)}, status=error.status_code)
+
         except OverflowError as error:
             return Response({'error': str(error)}, status=status.HTTP_403_FORBIDDEN)
 
         except ValueError as error:
             return Response({'error': str(error)}, status=status.HTTP_409_CONFLICT)
 
+        except IntegrityError:
+            return Response({'error': 'Task with this title already exists'},
+                            status=status.HTTP_409_CONFLICT)
+
         except:
             return Response({'error':"task creation failed"}, status=status.HTTP_400_BAD_REQUEST)
 
 
 
-class TaskUpdate(GenericAPIView):
+class TaskUpdate(MultiPartSchemaMixin, GenericAPIView):
     """
     An API view to update an existing task in user's todo list.
     Takes Token in headers and Title, Description, DueDate,
-    Attachment, CompletionStatus, CompletionDate in body.
-    Updates task in user's todo list and return task details in json format.
+    Attachment (optional), CompletionStatus, CompletionDate in body,
+    as multipart form data or JSON (without attachment). PUT takes all
+    required fields, PATCH only the fields to change.
+    Updates changed columns of task and return task details in json format.
     """
 
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
-    parser_classes = [MultiPartParser]
+    parser_classes = [MultiPartParser, JSONParser]
 
     attachment_parameter_config = openapi.Parameter(
         'attachment', in_=openapi.IN_FORM, description='file attachment',
-        type=openapi.TYPE_FILE, required=True)
+        type=openapi.TYPE_FILE, required=False)
 
     title_parameter_config = openapi.Parameter(
         'title', in_=openapi.IN_PATH, description='Title of task to update',
         type=openapi.TYPE_STRING, required=True)
 
+    def initial(self, request, *args, **kwargs):
+        """Stream the attachment to disk once the user is authenticated"""
+        super().initial(request, *args, **kwargs)
+        use_attachment_upload_handler(request, exclude_title=kwargs.get('title'))
+
+    @staticmethod
+    def save_task(request, task, partial=False):
+        """Validate request data and save changed columns of task"""
+
+        # defaults apply to a completionStatus sent by the client only, an
+        # absent one keeps the stored status and completion date
+        data = completion_defaults(task_data(request))
+        if 'completionStatus' not in data and not partial:
+            data['completionStatus'] = task.completionStatus
+
+        attachment = data.get('attachment')
+        if (hasattr(attachment, 'chunks') and task.attachment and
+            attachment_digest(attachment) == task.attachment_hash):
+            # identical file: keep the stored one instead of writing it again
+            del data['attachment']
+
+        data['user'] = task.user_id
+        serializer = TaskSerializer(task, data=data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     @swagger_auto_schema(manual_parameters=[attachment_parameter_config, title_parameter_config])
     def put(self, request, title):
         """PUT method to receive data, validate it and update the task."""
 
         try:
+            if not isinstance(request.data, dict):
+                return Response({'error': 'expected a JSON object or form data'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
             user_id = self.request.user.pk
-            if not Task.objects.filter(user_id=user_id, title=title).exists():
+            counts = Task.objects.validation_counts(user_id, request.data.get('title'),
+                                                    current_title=title)
+            if not counts['current']:
                 raise Task.DoesNotExist('Task matching query does not exist')
 
-            if ('title' not in request.data or
-                'dueDate' not in request.data or
-                'attachment' not in request.data):
+            if 'title' not in request.data or 'dueDate' not in request.data:
                 return Response({'error': 'missing required field(s)'},
                                 status=status.HTTP_400_BAD_REQUEST)
 
+            if counts['taken']:
+                raise ValueError('Task with this title already exists')
+
+            task = Task.objects.filter(user_id=user_id).get(title=title)
+            return self.save_task(request, task)
+
+        except UploadLimitExceeded as error:
+            return Response({'error': str(error.detail)}, status=error.status_code)
 
-            queryset = Task.objects.filter(user_id=user_id)
-            for query in queryset:
-                if title==request.data['title']:
-                    break
-                elif query.title==request.data['title']:
-                    raise ValueError('Task with this title already exists')
-                    break
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_409_CONFLICT)
 
-            queryset = queryset.get(title=title)
-            if 'completionStatus' not in request.data:
-                request.data['completionStatus'] = queryset.completionStatus
+        except IntegrityError:
+            return Response({'error': 'Task with this title already exists'},
+                            status=status.HTTP_409_CONFLICT)
 
-            elif 'completionStatus' in request.data:
-                request.data['completionStatus'] = request.data['completionStatus'].lower()
+        except Task.DoesNotExist as error:
+            return Response({'error': str(error)}, status=status.HTTP_404_NOT_FOUND)
 
-                if (request.data['completionStatus'] == 'true' and
-                    'completionDate' not in request.data):
-                    request.data['completionDate'] = datetime.utcnow()
+        except APIException as error:
+            return Response({'error':str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(manual_parameters=[attachment_parameter_config, title_parameter_config])
+    def patch(self, request, title):
+        """PATCH method to validate given fields and update only them."""
 
-            request.data['user'] = user_id
-            serializer = TaskSerializer(queryset, data=request.data)
-            serializer.is_valid(raise_exception=True)
-            task = serializer.save()
-            return Response(serializer.data)
+        try:
+            if not isinstance(request.data, dict):
+                return Response({'error': 'expected a JSON object or form data'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = self.request.user.pk
+            task = Task.objects.filter(user_id=user_id).get(title=title)
+
+            new_title = request.data.get('title', title)
+            if (new_title != title and
+                Task.objects.filter(user_id=user_id, title=new_title).exists()):
+                raise ValueError('Task with this title already exists')
+
+            return self.save_task(request, task, partial=True)
+
+        except UploadLimitExceeded as error:
+            return Response({'error': str(error.detail)}, status=error.status_code)
 
         except ValueError as error:
             return Response({'error': str(error)}, status=status.HTTP_409_CONFLICT)
 
+        except IntegrityError:
+            return Response({'error': 'Task with this title already exists'},
+                            status=status.HTTP_409_CONFLICT)
+
         except Task.DoesNotExist as error:
             return Response({'error': str(error)}, status=status.HTTP_404_NOT_FOUND)
 
@@ -184,15 +296,191 @@ class TaskDelete(GenericAPIView):
 
 
 
+class TaskBulk(GenericAPIView):
+    """
+    An API view to create, update or delete many tasks at once.
+    Takes Token in headers and a JSON array in body: tasks to create (POST),
+    tasks identified by Title with the fields to change (PUT) or titles of
+    tasks to delete (DELETE). Valid items are written in one transaction.
+    Returns result of every item in request order (207 if any item failed).
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser]
+
+    create_fields = ('title', 'description', 'dueDate', 'completionDate', 'completionStatus')
+    update_fields = ('description', 'dueDate', 'completionDate', 'completionStatus')
+
+    task_schema = openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'title': openapi.Schema(type=openapi.TYPE_STRING),
+        'description': openapi.Schema(type=openapi.TYPE_STRING),
+        'dueDate': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        'completionDate': openapi.Schema(type=openapi.TYPE_STRING,
+                                         format=openapi.FORMAT_DATETIME),
+        'completionStatus': openapi.Schema(type=openapi.TYPE_BOOLEAN)})
+
+    @staticmethod
+    def results_response(results, success_status):
+        """Return results with success_status, or 207 if any item failed"""
+        failed = any(result['status'] != success_status for result in results)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS if failed else success_status)
+
+    @swagger_auto_schema(request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=task_schema))
+    def post(self, request):
+        """POST method to validate and create tasks of a JSON array."""
+
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'error': 'expected a non empty JSON array of tasks'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = request.user.pk
+        existing = set(Task.objects.filter(user_id=user_id).values_list('title', flat=True))
+        free_slots = settings.MAX_TASKS_PER_USER - len(existing)
+
+        results, tasks = [], []
+        for index, item in enumerate(request.data):
+            if not isinstance(item, dict):
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST,
+                                'error': 'expected a task object'})
+                continue
+
+            serializer = TaskSerializer(data=completion_defaults(dict(item)),
+                                        fields=self.create_fields)
+            if not serializer.is_valid():
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST,
+                                'error': serializer.errors})
+                continue
+
+            title = serializer.validated_data['title']
+            if title in existing:
+                results.append({'index': index, 'title': title, 'status': status.HTTP_409_CONFLICT,
+                                'error': 'Task with this title already exists'})
+            elif len(tasks) >= free_slots:
+                results.append({'index': index, 'title': title, 'status': status.HTTP_403_FORBIDDEN,
+                                'error': "Can't add more tasks, you have reached maximum limit of "
+                                         + str(settings.MAX_TASKS_PER_USER) + "."})
+            else:
+                existing.add(title)
+                tasks.append(Task(user_id=user_id, **serializer.validated_data))
+                results.append({'index': index, 'title': title, 'status': status.HTTP_201_CREATED})
+
+        if tasks:
+            try:
+                with transaction.atomic():
+                    Task.objects.bulk_create(tasks)
+                    Task.objects.bulk_changed(user_id, titles_changed=True)
+            except IntegrityError:
+                return Response({'error': 'Task with this title already exists'},
+                                status=status.HTTP_409_CONFLICT)
+
+            # primary keys are not returned by bulk inserts on every database
+            created = Task.objects.filter(user_id=user_id,
+                                          title__in=[task.title for task in tasks])
+            created = {task.title: TaskSerializer(task).data for task in created}
+            for result in results:
+                if result['status'] == status.HTTP_201_CREATED:
+                    result['task'] = created[result['title']]
+
+        return self.results_response(results, status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=task_schema))
+    def put(self, request):
+        """PUT method to validate and update tasks (found by title) of a JSON array."""
+
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'error': 'expected a non empty JSON array of tasks'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = request.user.pk
+        titles = [item.get('title') for item in request.data
+                  if isinstance(item, dict) and isinstance(item.get('title'), str)]
+        tasks = {task.title: task for task in
+                 Task.objects.filter(user_id=user_id, title__in=titles)}
+
+        results, updated, changed_fields = [], {}, set()
+        for index, item in enumerate(request.data):
+            if not isinstance(item, dict) or not isinstance(item.get('title'), str):
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST,
+                                'error': 'expected a task object with a title'})
+                continue
+
+            task = tasks.get(item['title'])
+            if task is None:
+                results.append({'index': index, 'status': status.HTTP_404_NOT_FOUND,
+                                'error': 'task does not exist'})
+                continue
+
+            data = {field: value for field, value in item.items() if field in self.update_fields}
+            serializer = TaskSerializer(task, data=completion_defaults(data), partial=True,
+                                        fields=self.update_fields)
+            if not serializer.is_valid():
+                results.append({'index': index, 'title': task.title,
+                                'status': status.HTTP_400_BAD_REQUEST, 'error': serializer.errors})
+                continue
+
+            for field, value in serializer.validated_data.items():
+                setattr(task, field, value)
+                changed_fields.add(field)
+            updated[task.pk] = task
+            results.append({'index': index, 'title': task.title, 'status': status.HTTP_200_OK})
+
+        if updated and changed_fields:
+            with transaction.atomic():
+                Task.objects.bulk_update(list(updated.values()), sorted(changed_fields))
+                Task.objects.bulk_changed(user_id)
+
+        for result in results:
+            if result['status'] == status.HTTP_200_OK:
+                result['task'] = TaskSerializer(tasks[result['title']]).data
+
+        return self.results_response(results, status.HTTP_200_OK)
+
+    @swagger_auto_schema(request_body=openapi.Schema(
+        type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)))
+    def delete(self, request):
+        """DELETE method to delete tasks with titles of a JSON array."""
+
+        if (not isinstance(request.data, list) or not request.data or
+            not all(isinstance(title, str) for title in request.data)):
+            return Response({'error': 'expected a non empty JSON array of titles'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        deleted = Task.objects.bulk_delete(request.user.pk, request.data)
+
+        results = [{'index': index, 'title': title, 'status': status.HTTP_200_OK}
+                   if title in deleted else
+                   {'index': index, 'title': title, 'status': status.HTTP_404_NOT_FOUND,
+                    'error': 'task does not exist'}
+                   for index, title in enumerate(request.data)]
+        return self.results_response(results, status.HTTP_200_OK)
+
+
+
 class TaskList(GenericAPIView):
     """
     An API view to list all the tasks from user's todo list.
-    Takes Token in headers.
+    Takes Token in headers, optional comma separated Fields to
+    return and optional Cursor/Page_size for keyset pagination.
     Returns list of tasks details from user's todo list in json format.
     """
 
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
+
+    fields_parameter_config = openapi.Parameter(
+        'fields', in_=openapi.IN_QUERY, description='Comma separated fields to return',
+        type=openapi.TYPE_STRING, required=False)
 
+    cursor_parameter_config = openapi.Parameter(
+        'cursor', in_=openapi.IN_QUERY, description='Cursor of page to return',
+        type=openapi.TYPE_STRING, required=False)
+
+    page_size_parameter_config = openapi.Parameter(
+        'page_size', in_=openapi.IN_QUERY, description='Number of tasks per page',
+        type=openapi.TYPE_INTEGER, required=False)
+
+    @swagger_auto_schema(manual_parameters=[fields_parameter_config, cursor_parameter_config,
+                                            page_size_parameter_config])
     def get(self, request):
         """Return list of all the tasks of user."""
 
@@ -203,7 +491,24 @@ class TaskList(GenericAPIView):
         except Task.DoesNotExist:
             return Response({'response': 'tasks does not exist'}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = TaskSerializer(queryset, many=True)
+        fields = None
+        if request.query_params.get('fields'):
+            fields = [field for field in request.query_params['fields'].split(',') if field]
+            invalid_fields = set(fields) - set(TaskSerializer().fields)
+            if invalid_fields:
+                return Response({'error': 'invalid field(s): ' + ', '.join(sorted(invalid_fields))},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            # load only requested columns (description TextField is skipped
+            # unless asked for), plus the columns used by cursor pagination
+            queryset = queryset.only(*(set(fields) | {'completionStatus', 'dueDate'}))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = TaskSerializer(page, many=True, fields=fields)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = TaskSerializer(queryset, many=True, fields=fields)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -231,6 +536,43 @@ class TaskDetail(GenericAPIView):
 
 
 
+class TaskAttachment(GenericAPIView):
+    """
+    An API view to download attachment of a specific task.
+    Takes Token in headers and Title of the task.
+    Streams the attachment, supporting Range (206) and
+    If-None-Match (304) requests.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    title_parameter_config = openapi.Parameter(
+        'title', in_=openapi.IN_PATH, description='Title of task',
+        type=openapi.TYPE_STRING, required=True)
+
+    range_parameter_config = openapi.Parameter(
+        'Range', in_=openapi.IN_HEADER, description='byte range e.g. bytes=0-1023',
+        type=openapi.TYPE_STRING, required=False)
+
+    @swagger_auto_schema(manual_parameters=[title_parameter_config, range_parameter_config])
+    def get(self, request, title):
+        """Return attachment of a specific task."""
+
+        try:
+            user_id = self.request.user.pk
+            task = (Task.objects.filter(user_id=user_id)
+                    .only('title', 'attachment', 'attachment_hash').get(title=title))
+        except Task.DoesNotExist:
+            return Response({'error': 'task does not exist'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not task.attachment or not task.attachment.storage.exists(task.attachment.name):
+            return Response({'error': 'task has no attachment'},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        return attachment_response(request, task, attachment_filename(task))
+
+
+
 
 # Reports
 
@@ -248,21 +590,13 @@ class TotalTasks(GenericAPIView):
         """Return total, completed and remaining tasks of user."""
 
         try:
-            if cache.get(str(request.user.pk)+'_TotalTasks'):
+            cached_report = get_report(request.user.pk, 'TotalTasks')
+            if cached_report:
                 print('from cache')
-                return Response(cache.get(str(request.user.pk)+'_TotalTasks'),
-                	            status=status.HTTP_201_CREATED)
+                return Response(cached_report, status=status.HTTP_201_CREATED)
 
-            user_id = self.request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id)
-            total_tasks = len(queryset)
-            completed_tasks = len(queryset.filter(completionStatus=True))
-            remaining_tasks = total_tasks - completed_tasks
-            report = {'Total Tasks' : total_tasks,
-                    'Completed Tasks' : completed_tasks,
-                    'Remaining Tasks' : remaining_tasks}
-
-            cache.set(str(request.user.pk)+'_TotalTasks', report, 60*15)
+            report = reports.total_tasks(request.user)
+            set_report(request.user.pk, 'TotalTasks', report)
             print('from db')
 
             return Response(report, status=status.HTTP_201_CREATED)
@@ -286,25 +620,13 @@ class AverageCompleted(GenericAPIView):
         """Return average completed tasks since day of account creation."""
 
         try:
-            if cache.get(str(request.user.pk)+'_AverageCompleted'):
+            cached_report = get_report(request.user.pk, 'AverageCompleted')
+            if cached_report:
                 print('from cache')
-                return Response(cache.get(str(request.user.pk)+'_AverageCompleted'),
-                	            status=status.HTTP_201_CREATED)
-
-            user_id = self.request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id, completionStatus=True)
-            creation_date = request.user.created_at
-            now = datetime.now(timezone.utc)
-            total_days = (now-creation_date).days
-            completed_tasks = len(queryset)
-            report = {}
-
-            if total_days == 0:
-                report['Average completed tasks'] = str(completed_tasks)+'/day'
-            else:
-                report['Average completed tasks'] = str(completed_tasks/total_days)+'/day'
+                return Response(cached_report, status=status.HTTP_201_CREATED)
 
-            cache.set(str(request.user.pk)+'_AverageCompleted', report, 60*15)
+            report = reports.average_completed(request.user)
+            set_report(request.user.pk, 'AverageCompleted', report, reports.seconds_to_next_day(request.user))
             print('from db')
             return Response(report, status=status.HTTP_201_CREATED)
 
@@ -327,31 +649,13 @@ class OverdueTasks(GenericAPIView):
         """Return no of overdue tasks."""
 
         try:
-            if cache.get(str(request.user.pk)+'_OverdueTasks'):
+            cached_report = get_report(request.user.pk, 'OverdueTasks')
+            if cached_report:
                 print('from cache')
-                return Response(cache.get(str(request.user.pk)+'_OverdueTasks'),
-                	            status=status.HTTP_201_CREATED)
+                return Response(cached_report, status=status.HTTP_201_CREATED)
 
-            user_id = request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id)
-            now = datetime.now(timezone.utc)
-            report = {}
-            overdue_tasks = 0
-
-            for query in queryset:
-                if query.completionStatus: # ==True:
-                    if query.completionDate > query.dueDate:
-                        overdue_tasks += 1
-                else:
-                    if now > query.dueDate:
-                        overdue_tasks += 1
-
-            if overdue_tasks==0:
-                report['Response'] = 'No any task overdue'
-            else:
-                report['No. of tasks not completed on time'] = str(overdue_tasks)
-
-            cache.set(str(request.user.pk)+'_OverdueTasks', report, 60*15)
+            report = reports.overdue_tasks(request.user)
+            set_report(request.user.pk, 'OverdueTasks', report, reports.seconds_to_next_due(request.user.pk))
             print('from db')
             return Response(report, status=status.HTTP_201_CREATED)
 
@@ -374,34 +678,13 @@ class MaxDate(GenericAPIView):
         """Return date on which maximum tasks were completed."""
 
         try:
-            if cache.get(str(request.user.pk)+'_MaxDate'):
+            cached_report = get_report(request.user.pk, 'MaxDate')
+            if cached_report:
                 print('from cache')
-                return Response(cache.get(str(request.user.pk)+'_MaxDate'),
-                	            status=status.HTTP_201_CREATED)
+                return Response(cached_report, status=status.HTTP_201_CREATED)
 
-            user_id = request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id, completionStatus=True)
-            completion_dates = {}
-            report = {}
-
-            for query in queryset:
-                date = str(query.completionDate.date())
-                if date not in completion_dates:
-                    completion_dates[date] = 1
-                else:
-                    completion_dates[date] += 1
-
-            max_tasks = 0
-            max_date = None
-            for date, completed_tasks in completion_dates.items():
-                if completed_tasks > max_tasks:
-                    max_tasks = completed_tasks
-                    max_date = date
-
-            report['Maximum tasks completed on'] = max_date
-            report['No. of tasks'] = str(max_tasks)
-
-            cache.set(str(request.user.pk)+'_MaxDate', report, 60*15)
+            report = reports.max_date(request.user)
+            set_report(request.user.pk, 'MaxDate', report)
             print('from db')
             return Response(report, status=status.HTTP_201_CREATED)
 
@@ -428,29 +711,17 @@ class CountOpened(GenericAPIView):
         """
 
         try:
-            if cache.get(str(request.user.pk)+'_CountOpened'):
+            cached_report = get_report(request.user.pk, 'CountOpened')
+            if cached_report:
                 print('from cache')
-                return Response(cache.get(str(request.user.pk)+'_CountOpened'),
-                	            status=status.HTTP_201_CREATED)
-
-            user_id = request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id)
-            weekdays = ['Monday', 'Tuesday', 'Wednesday', 'Thursday',
-                        'Friday', 'Saturday', 'Sunday']
-            opened_dates = {}
-
-            for query in queryset:
-                weekday = query.creationDate.weekday()
-                if weekdays[weekday] not in opened_dates:
-                    opened_dates[weekdays[weekday]] = 1
-                else:
-                    opened_dates[weekdays[weekday]] += 1
+                return Response(cached_report, status=status.HTTP_201_CREATED)
 
+            opened_dates = reports.count_opened(request.user)
             if len(opened_dates)==0:
                 print('from db')
                 return Response({'response':None}, status=status.HTTP_200_OK)
 
-            cache.set(str(request.user.pk)+'_CountOpened', opened_dates, 60*15)
+            set_report(request.user.pk, 'CountOpened', opened_dates)
             print('from db')
             return Response(opened_dates, status=status.HTTP_201_CREATED)
 
@@ -459,53 +730,93 @@ class CountOpened(GenericAPIView):
 
 
 
+class ReportSummary(GenericAPIView):
+    """
+    An API view to generate all reports in one request.
+    Takes Token in headers and optional comma separated Include
+    (total-tasks, average-completed, overdue-tasks, max-date, count-opened).
+    Return bundle of requested reports computed together and cached as one.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    include_parameter_config = openapi.Parameter(
+        'include', in_=openapi.IN_QUERY, description='Comma separated reports to return',
+        type=openapi.TYPE_STRING, required=False)
+
+    @swagger_auto_schema(manual_parameters=[include_parameter_config])
+    def get(self, request):
+        """Return total tasks, average completed, overdue tasks, max date and count opened."""
+
+        include = list(reports.SUMMARY_REPORTS)
+        if request.query_params.get('include'):
+            include = [name for name in request.query_params['include'].split(',') if name]
+            invalid_reports = set(include) - set(reports.SUMMARY_REPORTS)
+            if invalid_reports:
+                return Response({'error': 'invalid report(s): ' + ', '.join(sorted(invalid_reports))},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        summary = get_report(request.user.pk, 'ReportSummary')
+        if summary:
+            print('from cache')
+        else:
+            summary = reports.summary(request.user)
+            set_report(request.user.pk, 'ReportSummary', summary,
+                       min(reports.seconds_to_next_day(request.user),
+                           reports.seconds_to_next_due(request.user.pk)))
+            print('from db')
+
+        return Response({name: summary[name] for name in include}, status=status.HTTP_200_OK)
+
+
+
 # Algorithms
 
 class SimilarTasks(GenericAPIView):
     """
     An API view to find similar tasks in user's todo list.
-    Takes Token in headers.
-    Return list of similar tasks from user's todo list.
+    Takes Token in headers and optional Mode (subset, jaccard, minhash).
+    Return list of similar tasks from user's todo list, read from
+    precomputed pairs when Mode is the configured SIMILAR_TASKS_MODE.
     """
 
     permission_classes = [IsAuthenticated]
 
+    mode_parameter_config = openapi.Parameter(
+        'mode', in_=openapi.IN_QUERY, description='Similarity mode: subset, jaccard or minhash',
+        type=openapi.TYPE_STRING, required=False)
+
+    @swagger_auto_schema(manual_parameters=[mode_parameter_config])
     def get(self, request):
         """Return list containing lists of similar tasks."""
 
         try:
+            mode = request.query_params.get('mode', settings.SIMILAR_TASKS_MODE)
+            if mode not in SIMILARITY_MODES:
+                return Response({'error': 'invalid mode: ' + mode},
+                                status=status.HTTP_400_BAD_REQUEST)
+
             user_id = request.user.pk
-            queryset = Task.objects.all().filter(user_id=user_id)
-            if len(queryset)==0:
+            total_tasks = Task.objects.filter(user_id=user_id).count()
+            if total_tasks==0:
                 raise Task.DoesNotExist('tasks does not exist')
-            elif len(queryset)==1:
+            elif total_tasks==1:
                 return Response({"response" : "Can't find similar tasks, only 1 task exists"},
                 	            status=status.HTTP_200_OK)
 
-            similar_tasks = []
-            for i in range(0, len(queryset)-1):
-                for j in range(i+1, len(queryset)):
-                    if len(queryset[i].title) > len(queryset[j].title):
-                        title1 = queryset[j].title.split(' ')
-                        title2 = queryset[i].title.split(' ')
-                    else:
-                        title1 = queryset[i].title.split(' ')
-                        title2 = queryset[j].title.split(' ')
-
-                    similarity = True
-                    for word in title1:
-                        if word not in title2:
-                            similarity = False
-                            break
-
-                    if similarity:
-                        similar_tasks.append([queryset[i].title, queryset[j].title])
+            if mode == settings.SIMILAR_TASKS_MODE:
+                similar_tasks = SimilarTaskPair.objects.pairs_for_user(user_id)
+            else:
+                titles = list(Task.objects.filter(user_id=user_id).values_list('title', flat=True))
+                options = SimilarTaskPair.objects.options()
+                options['mode'] = mode
+                similar_tasks = similar_pairs(titles, **options)
 
             if len(similar_tasks)==0:
                 return Response({'response': 'No any similar tasks found'},
                 	            status=status.HTTP_200_OK)
             else:
-                return Response({'List of similar tasks': str(similar_tasks)},
+                return Response({'List of similar tasks': similar_tasks},
                 	            status=status.HTTP_201_CREATED)
 
         except Task.DoesNotExist:
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'api',
     'accounts',
     'social_auth',
+    'outbox',
 
     # django apps
     'django.contrib.admin',
@@ -133,6 +134,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# new passwords are hashed with the first hasher, older hashes are checked
+# with the others and rehashed with the first one on the user's next login
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# argon2 costs: iterations, memory in KiB and lanes per password hash
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19*1024
+ARGON2_PARALLELISM = 1
+
+# logins are refused for LOGIN_FAILURE_WINDOW seconds once a client IP or
+# an account reaches its number of failed logins within the window
+LOGIN_FAILURE_WINDOW = 60*15
+LOGIN_FAILURES_PER_IP = 50
+LOGIN_FAILURES_PER_ACCOUNT = 10
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -176,7 +196,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ]
 }
 
@@ -189,6 +209,45 @@ SESSION_COOKIE_SAMESITE = 'None'
 
 CACHE_TTL = 60*15
 
+# cached reports are invalidated whenever a task of the user changes
+REPORT_CACHE_TTL = 60*60*24
+
+MAX_TASKS_PER_USER = 50
+
+# users of API tokens are cached this long (deleted on logout and user changes)
+AUTH_TOKEN_CACHE_TTL = 60*5
+
+# attachments are streamed to disk by api.uploads.AttachmentUploadHandler,
+# which rejects files over ATTACHMENT_MAX_SIZE bytes or taking the user's
+# attachments over ATTACHMENT_USER_QUOTA bytes
+ATTACHMENT_MAX_SIZE = 10*1024*1024
+ATTACHMENT_USER_QUOTA = 100*1024*1024
+
+# task-attachment/ downloads are streamed by django unless this is set to
+# the prefix of an internal web server location serving MEDIA_ROOT (e.g.
+# '/protected-media/' for nginx), which is then sent in X-Accel-Redirect
+ATTACHMENT_ACCEL_REDIRECT = None
+
+# similar tasks report: 'subset', 'jaccard' or 'minhash' (see api.similarity).
+# Precomputed pairs follow this mode, run rebuild_similar_tasks after changing it.
+SIMILAR_TASKS_MODE = 'subset'
+SIMILAR_TASKS_THRESHOLD = 0.5
+SIMILAR_TASKS_MINHASH_PERMUTATIONS = 32
+SIMILAR_TASKS_MINHASH_BANDS = 8
+
+# daily remainders: users are split into REMAINDER_SHARDS buckets (user id
+# modulo shards) sent by a pool of REMAINDER_PROCESSES processes
+REMAINDER_SHARDS = 8
+REMAINDER_PROCESSES = 4
+
+# emails are queued in the outbox and sent by the drain_outbox worker;
+# failed emails are retried after OUTBOX_RETRY_DELAY seconds, doubled on
+# every attempt, until OUTBOX_MAX_ATTEMPTS
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_LEASE = 60*5
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -219,10 +278,22 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 GOOGLE_CLIENT_ID = config('CLIENT_ID') #credentials.CLIENT_ID 
 GOOGLE_CLIENT_SECRET = config('CLIENT_SECRET') #credentials.CLIENT_SECRET
 
+# Google ID tokens are verified locally with Google's certs, cached for the
+# max-age Google sends (or GOOGLE_CERTS_DEFAULT_TTL seconds). A {key id:
+# x509 certificate PEM} dict here replaces Google's certs (e.g. in tests).
+GOOGLE_ID_TOKEN_CERTS = None
+GOOGLE_CERTS_DEFAULT_TTL = 60*60
+# tokens signed with a key id missing from cached certs refetch the certs
+# at most once per this many seconds
+GOOGLE_CERTS_REFRESH_INTERVAL = 60
+
 
 CRONTAB_COMMAND_SUFFIX = '2>&1'
 CRONJOBS = [
-    ('0 0 * * *', 'api.cron.send_remainders', '> ~/cron_job.log')
+    # every hour, remainders of users whose local day just started
+    ('0 * * * *', 'api.cron.send_hourly_remainders', '>> ~/cron_job.log'),
+    # delete attachment files released by deleted or updated tasks
+    ('*/5 * * * *', 'api.cleanup.sweep_deletions', '>> ~/cron_job.log'),
 ]
 
 
@@ -0,0 +1,13 @@
+"""Register outbox models here."""
+
+from django.contrib import admin
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Register outbound email model to display columns in database."""
+
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at',
+                    'created_at', 'sent_at']
+    list_filter = ['status']
@@ -0,0 +1,9 @@
+"""Configuration file for outbox"""
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    """Outbox configuration"""
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'outbox'
@@ -0,0 +1,101 @@
+"""Module to queue emails and send queued emails"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboundEmail
+
+
+def queued_email(subject, message, recipient_list, from_email=None):
+    """Return unsaved OutboundEmail for given email fields"""
+    return OutboundEmail(subject=subject, body=message, from_email=from_email,
+                         recipients='\n'.join(recipient_list))
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Queue email to be sent by the outbox worker (same arguments as send_mail)"""
+    email = queued_email(subject, message, recipient_list, from_email)
+    email.save()
+    return email
+
+
+def enqueue_messages(messages):
+    """Queue EmailMessages in one insert, return number of queued emails"""
+    return len(OutboundEmail.objects.bulk_create(
+        [queued_email(message.subject, message.body, message.to, message.from_email)
+         for message in messages]))
+
+
+def claim_pending(batch_size):
+    """
+    Return up to batch_size due pending emails, moving their next attempt
+    OUTBOX_LEASE seconds ahead so other workers skip them meanwhile. Emails
+    of a worker that dies while sending become due again after the lease.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutboundEmail.objects.select_for_update(skip_locked=True)
+                      .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+                      .order_by('next_attempt_at', 'pk')[:batch_size])
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE))
+    return emails
+
+
+def record_failure(email, error):
+    """Schedule retry of email with exponential backoff, or fail it after max attempts"""
+    attempts = email.attempts + 1
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    status = (OutboundEmail.FAILED if attempts >= settings.OUTBOX_MAX_ATTEMPTS
+              else OutboundEmail.PENDING)
+
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        attempts=attempts, status=status, last_error=str(error)[:1000],
+        next_attempt_at=timezone.now() + timedelta(seconds=delay))
+
+
+def send_pending(batch_size=None):
+    """
+    Send one batch of due pending emails over a single mail connection.
+    Return number of emails claimed, sent and failed.
+    """
+    emails = claim_pending(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0, 0
+
+    sent, failed = [], {}
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for email in emails:
+                try:
+                    email.message(connection).send()
+                    sent.append(email.pk)
+                except Exception as error:
+                    failed[email.pk] = error
+    except Exception as error:
+        # connection could not be opened (or closed): retry what was not sent
+        for email in emails:
+            if email.pk not in sent:
+                failed.setdefault(email.pk, error)
+
+    OutboundEmail.objects.filter(pk__in=sent).update(
+        status=OutboundEmail.SENT, sent_at=timezone.now(), attempts=F('attempts') + 1)
+    for email in emails:
+        if email.pk in failed:
+            record_failure(email, failed[email.pk])
+
+    return len(emails), len(sent), len(failed)
+
+
+def drain(batch_size=None):
+    """Send due pending emails batch by batch until none is left, return sent and failed"""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total_sent = total_failed = 0
+    while True:
+        claimed, sent, failed = send_pending(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if claimed < batch_size:
+            return total_sent, total_failed
@@ -0,0 +1,33 @@
+"""Worker sending queued emails"""
+import time
+from django.core.management.base import BaseCommand
+from outbox.mail import drain
+
+
+
+class Command(BaseCommand):
+    """
+    Sends due emails of the outbox in batches over one mail connection
+    per batch, retrying failed emails with exponential backoff. Runs
+    until stopped, or drains once with --once.
+    """
+
+    help = 'Send queued emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='drain once and exit')
+        parser.add_argument('--batch-size', type=int, help='emails per batch (OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='seconds to wait when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            sent, failed = drain(options['batch_size'])
+            if sent or failed:
+                self.stdout.write('outbox: {} sent, {} failed in {:.2f}s'.format(
+                    sent, failed, time.perf_counter() - started))
+
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
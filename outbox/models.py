@@ -0,0 +1,49 @@
+"""Module to create models for outbox"""
+from django.core.mail import EmailMessage
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """
+    Model to queue emails, written inside the request or job and
+    sent later by the drain_outbox worker.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    # recipient addresses, one per line
+    recipients = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    # pending emails are sent once this time has passed; it is moved ahead
+    # while a worker is sending and on every failed attempt (backoff)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        """Returns subject and recipients of email."""
+        return '{} -> {}'.format(self.subject, ', '.join(self.recipient_list))
+
+    @property
+    def recipient_list(self):
+        """Return list of recipient addresses"""
+        return self.recipients.split('\n')
+
+    def message(self, connection=None):
+        """Return EmailMessage of queued email"""
+        return EmailMessage(subject=self.subject, body=self.body, from_email=self.from_email,
+                            to=self.recipient_list, connection=connection)
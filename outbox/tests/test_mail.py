@@ -0,0 +1,67 @@
+"""Module to define test cases for the outbox"""
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from outbox.mail import enqueue_mail, enqueue_messages, send_pending, drain
+from outbox.models import OutboundEmail
+
+
+
+class TestOutbox(TestCase):
+    """Test cases for queueing and sending emails"""
+
+    def test_enqueue_does_not_send(self):
+        """Queued email is stored, not sent"""
+        email = enqueue_mail('subject', 'body', ['to@todo.local'])
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(email.status, OutboundEmail.PENDING)
+        self.assertEqual(email.recipient_list, ['to@todo.local'])
+
+
+    def test_drain_sends_pending_emails(self):
+        """Drain sends every pending email once and marks it sent"""
+        enqueue_mail('first', 'body', ['first@todo.local'])
+        enqueue_messages([EmailMessage('second', 'body', None, ['second@todo.local']),
+                          EmailMessage('third', 'body', None, ['third@todo.local'])])
+
+        self.assertEqual(drain(batch_size=2), (3, 0))
+        self.assertEqual(sorted(message.subject for message in mail.outbox),
+                         ['first', 'second', 'third'])
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+
+        self.assertEqual(drain(), (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+
+    def test_emails_due_later_are_not_sent(self):
+        """Emails waiting for a retry are skipped until due"""
+        email = enqueue_mail('later', 'body', ['to@todo.local'])
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(send_pending(), (0, 0, 0))
+        self.assertEqual(mail.outbox, [])
+
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+    def test_failed_email_retried_with_backoff(self):
+        """Failed email is retried later with doubled delay, then marked failed"""
+        email = enqueue_mail('subject', 'body', ['to@todo.local'])
+
+        with mock.patch.object(EmailMessage, 'send', side_effect=OSError('smtp down')):
+            self.assertEqual(send_pending(), (1, 0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertIn('smtp down', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            send_pending()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.FAILED, 2))
+
+        self.assertEqual(mail.outbox, [])
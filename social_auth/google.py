@@ -1,6 +1,94 @@
 """Module for OAuth 2 google validation"""
+import json
+import re
+import time
+from django.conf import settings
+from django.core.cache import cache
+from google.auth import jwt
 from google.auth.transport import requests
-from google.oauth2 import id_token
+
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_CERTS_CACHE_KEY = 'google_oauth2_certs'
+# present while certs may not be fetched again for an unknown key id
+GOOGLE_CERTS_REFRESH_KEY = 'google_oauth2_certs_refreshed'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+# certs of this process as (certs, expiry timestamp), shared by its requests
+_process_certs = (None, 0)
+
+
+def certs_max_age(headers):
+    """Return seconds certs may be cached for, from Cache-Control of their response"""
+    # headers of google.auth responses are case insensitive
+    match = MAX_AGE_RE.search(headers.get('cache-control', ''))
+    return int(match.group(1)) if match else settings.GOOGLE_CERTS_DEFAULT_TTL
+
+
+def fetch_certs():
+    """Fetch Google's {key id: x509 certificate} certs, return them and their max age"""
+    response = requests.Request()(GOOGLE_CERTS_URL, method='GET')
+    if response.status != 200:
+        raise ValueError('Could not fetch certificates at ' + GOOGLE_CERTS_URL)
+    return json.loads(response.data.decode('utf-8')), certs_max_age(response.headers)
+
+
+def google_certs(refresh=False):
+    """
+    Return Google's certs for verifying ID tokens: the key set configured in
+    GOOGLE_ID_TOKEN_CERTS (stand-in keys of tests), else certs cached in this
+    process or in the shared cache until they expire, else freshly fetched.
+    Refresh skips both caches (e.g. for a token signed with a new key).
+    """
+    global _process_certs
+
+    if settings.GOOGLE_ID_TOKEN_CERTS is not None:
+        return settings.GOOGLE_ID_TOKEN_CERTS
+
+    now = time.time()
+    if not refresh:
+        certs, expires = _process_certs
+        if certs is not None and now < expires:
+            return certs
+
+        cached = cache.get(GOOGLE_CERTS_CACHE_KEY)
+        if cached is not None and now < cached[1]:
+            _process_certs = cached
+            return cached[0]
+
+    certs, max_age = fetch_certs()
+    _process_certs = (certs, now + max_age)
+    cache.set(GOOGLE_CERTS_CACHE_KEY, _process_certs, max_age)
+    cache.set(GOOGLE_CERTS_REFRESH_KEY, True, settings.GOOGLE_CERTS_REFRESH_INTERVAL)
+    return certs
+
+
+def certs_refresh_allowed():
+    """
+    Return True (at most once per GOOGLE_CERTS_REFRESH_INTERVAL seconds
+    across processes) if certs may be fetched again for an unknown key id,
+    so made up key ids cannot force a request to Google per login.
+    """
+    return cache.add(GOOGLE_CERTS_REFRESH_KEY, True, settings.GOOGLE_CERTS_REFRESH_INTERVAL)
+
+
+def verify_id_token(auth_token):
+    """
+    Verify signature and expiry of Google ID token locally with cached
+    certs, return its claims. Raise ValueError for an invalid token.
+    """
+    certs = google_certs()
+    if jwt.decode_header(auth_token).get('kid') not in certs and certs_refresh_allowed():
+        # Google may have rotated its keys since certs were cached, otherwise
+        # decode rejects the unknown key id
+        certs = google_certs(refresh=True)
+
+    idinfo = jwt.decode(auth_token, certs=certs)
+    if idinfo.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError('Wrong issuer ' + str(idinfo.get('iss')))
+    return idinfo
 
 
 class Google:
@@ -9,14 +97,10 @@ class Google:
     @staticmethod
     def validate(auth_token):
         """
-        validate method Queries the Google oAUTH2 api to fetch the user info
+        validate method verifies the Google ID token and returns the user info
         """
         try:
-            idinfo = id_token.verify_oauth2_token(
-                auth_token, requests.Request())
-
-            if 'accounts.google.com' in idinfo['iss']:
-                return idinfo
+            return verify_id_token(auth_token)
 
         except:
             return "The token is either invalid or has expired"
@@ -0,0 +1,40 @@
+"""Benchmark generating usernames for names many users already have"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts.models import User
+from social_auth.register import generate_username
+from utils.benchmark import rolled_back, measure, summarize
+
+
+
+class Command(BaseCommand):
+    """
+    Creates users named like one name followed by numbers (rolled back
+    afterwards) and measures generating a free username for that name.
+    """
+
+    help = 'Measure username generation for a name with many colliding users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='users with colliding names')
+        parser.add_argument('--repeat', type=int, default=20, help='number of timed generations')
+
+    def handle(self, *args, **options):
+        name = 'Benchmark Name'
+        username = generate_username(name)
+
+        with rolled_back():
+            User.objects.bulk_create(
+                [User(username=username + (str(number) if number else ''),
+                      email=username + str(number) + '@benchmark.local')
+                 for number in range(options['users'])],
+                batch_size=1000)
+
+            with CaptureQueriesContext(connection) as queries:
+                generated = generate_username(name)
+            timings = measure(lambda: generate_username(name), repeat=options['repeat'])
+
+            self.stdout.write('{} colliding users on {}: generated {} with {} queries, {}'.format(
+                options['users'], connection.vendor, generated, len(queries),
+                summarize(timings)))
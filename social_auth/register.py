@@ -1,57 +1,60 @@
 """Module to register social auth users"""
-import random
+import re
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.authtoken.models import Token
-from django.conf import settings
-from django.contrib.auth import authenticate
 from accounts.models import User
 
 
 
 def generate_username(name):
-    """Check if username already exists then generate new unique username"""
+    """
+    Return username made of name, or name followed by its smallest free
+    number when taken, reading all taken candidates in a single query.
+    """
     username = "".join(name.split(' ')).lower()
 
-    if not User.objects.filter(username=username).exists():
+    taken = {taken_username.lower() for taken_username in
+             User.objects.filter(username__istartswith=username,
+                                 username__iregex=r'^' + re.escape(username) + r'[0-9]*$')
+             .values_list('username', flat=True)}
+
+    if username not in taken:
         return username
 
-    else:
-        random_username = username + str(random.randint(0, 1000))
-        return generate_username(random_username)
+    suffixes = {int(taken_username[len(username):]) for taken_username in taken
+                if taken_username[len(username):].isdigit()}
+    # one of the first len(taken) + 1 numbers is free
+    suffix = min(set(range(1, len(taken) + 2)) - suffixes)
+    return username + str(suffix)
+
+
+def social_login_data(user):
+    """Return username, email and API token of logged in social user"""
+    token, created = Token.objects.get_or_create(user=user)
+    return {
+        'username': user.username,
+        'email': user.email,
+        'token': token.key}
 
 
 def register_social_user(provider, user_id, email, name):
-    """Create account of social auth user if not exists"""
-    filtered_user_by_email = User.objects.filter(email=email)
-
-    if filtered_user_by_email.exists():
-
-        if provider == filtered_user_by_email[0].auth_provider:
-
-            registered_user = authenticate(email=email, password=settings.GOOGLE_CLIENT_SECRET)
-            token, created = Token.objects.get_or_create(user=registered_user)
-            return {
-                'username': registered_user.username,
-                'email': registered_user.email,
-                'token': token.key}
-
-        else:
-            raise AuthenticationFailed(detail='Please continue your login using '
-                                       + filtered_user_by_email[0].auth_provider)
-
-    else:
-        user = {
-            'username': generate_username(name), 'email': email,
-            'password': settings.GOOGLE_CLIENT_SECRET}
-        user = User.objects.create_user(**user)
-        user.email_verified = True
-        user.auth_provider = provider
-        user.save()
-
-        new_user = authenticate(email=email, password=settings.GOOGLE_CLIENT_SECRET)
-        token, created = Token.objects.get_or_create(user=new_user)
-        return {
-            'email': new_user.email,
-            'username': new_user.username,
-            'token': token.key
-        }
+    """
+    Log in social auth user, creating their account on first login.
+    Provider has already verified the user, so accounts get an unusable
+    password and no password is hashed or checked.
+    """
+    user = User.objects.filter(email=email).first()
+
+    if user is None:
+        user = User.objects.create_user(username=generate_username(name), email=email,
+                                        password=None, email_verified=True,
+                                        auth_provider=provider)
+
+    elif user.auth_provider != provider:
+        raise AuthenticationFailed(detail='Please continue your login using '
+                                   + user.auth_provider)
+
+    elif not user.is_active:
+        raise AuthenticationFailed(detail='User inactive or deleted.')
+
+    return social_login_data(user)
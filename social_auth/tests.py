@@ -1 +1,232 @@
 """Module to define test cases for social auth"""
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.urls import reverse
+from google.auth import crypt, jwt
+from accounts.models import User
+from utils.setup_test import TestSetUp
+from . import google
+from .register import generate_username
+
+
+CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+
+def stand_in_key(key_id):
+    """Return (signer, {key_id: certificate PEM}) of a new RSA key standing in for Google's"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'stand-in')])
+    certificate = (x509.CertificateBuilder()
+                   .subject_name(name).issuer_name(name)
+                   .public_key(key.public_key())
+                   .serial_number(x509.random_serial_number())
+                   .not_valid_before(datetime.utcnow() - timedelta(days=1))
+                   .not_valid_after(datetime.utcnow() + timedelta(days=1))
+                   .sign(key, hashes.SHA256()))
+
+    private_pem = key.private_bytes(serialization.Encoding.PEM,
+                                    serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption())
+    signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+    return signer, {key_id: certificate.public_bytes(serialization.Encoding.PEM).decode()}
+
+
+SIGNER, CERTS = stand_in_key('stand-in-key')
+OTHER_SIGNER, OTHER_CERTS = stand_in_key('other-key')
+# another key claiming the key id of SIGNER
+FORGED_SIGNER, _ = stand_in_key('stand-in-key')
+
+
+def id_token(signer=SIGNER, **claims):
+    """Return ID token signed by signer with default Google claims updated by claims"""
+    now = int(time.time())
+    payload = {'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': '1234',
+               'email': 'social@example.com', 'name': 'Social User',
+               'iat': now, 'exp': now + 3600}
+    payload.update(claims)
+    return jwt.encode(signer, payload).decode()
+
+
+
+@override_settings(GOOGLE_ID_TOKEN_CERTS=CERTS)
+class TestGoogleValidate(SimpleTestCase):
+    """Test cases for local verification of Google ID tokens"""
+
+    def test_valid_token(self):
+        """Token signed by a known key returns its claims"""
+        idinfo = google.Google.validate(id_token())
+        self.assertEqual((idinfo['sub'], idinfo['email']), ('1234', 'social@example.com'))
+
+
+    def test_expired_token(self):
+        """Expired token is rejected"""
+        now = int(time.time())
+        self.assertIsInstance(google.Google.validate(id_token(iat=now-7200, exp=now-3600)), str)
+
+
+    def test_unknown_signature(self):
+        """Token signed by another key is rejected"""
+        forged = id_token(signer=FORGED_SIGNER)
+        self.assertIsInstance(google.Google.validate(forged), str)
+
+
+    def test_wrong_issuer(self):
+        """Token not issued by Google is rejected"""
+        self.assertIsInstance(google.Google.validate(id_token(iss='https://example.com')), str)
+
+
+
+@override_settings(GOOGLE_ID_TOKEN_CERTS=None, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'google-certs'}})
+class TestGoogleCerts(SimpleTestCase):
+    """Test cases for caching Google's certs"""
+
+    def setUp(self):
+        google._process_certs = (None, 0)
+        cache.delete_many([google.GOOGLE_CERTS_CACHE_KEY, google.GOOGLE_CERTS_REFRESH_KEY])
+        fetch = mock.patch.object(google, 'fetch_certs', return_value=(CERTS, 300))
+        self.fetch_certs = fetch.start()
+        self.addCleanup(fetch.stop)
+
+
+    def test_certs_fetched_once(self):
+        """Certs are fetched once and then served from this process"""
+        for _ in range(3):
+            self.assertIsInstance(google.Google.validate(id_token()), dict)
+        self.assertEqual(self.fetch_certs.call_count, 1)
+
+
+    def test_certs_shared_through_cache(self):
+        """Another process reads certs fetched by this one from the cache"""
+        google.google_certs()
+        google._process_certs = (None, 0)
+
+        self.assertEqual(google.google_certs(), CERTS)
+        self.assertEqual(self.fetch_certs.call_count, 1)
+
+
+    def test_certs_refetched_after_max_age(self):
+        """Certs are fetched again once their max-age passed"""
+        google.google_certs()
+        with mock.patch.object(google.time, 'time', return_value=time.time() + 301):
+            google.google_certs()
+        self.assertEqual(self.fetch_certs.call_count, 2)
+
+
+    def test_certs_refetched_for_unknown_key(self):
+        """Token signed with a key missing from cached certs refreshes them"""
+        google.google_certs()
+        self.fetch_certs.return_value = (dict(CERTS, **OTHER_CERTS), 300)
+        # refresh interval since the last fetch has passed
+        cache.delete(google.GOOGLE_CERTS_REFRESH_KEY)
+
+        self.assertIsInstance(google.Google.validate(id_token(signer=OTHER_SIGNER)), dict)
+        self.assertEqual(self.fetch_certs.call_count, 2)
+
+
+    def test_unknown_keys_refetch_certs_once_per_interval(self):
+        """Made up key ids cannot make every login fetch certs"""
+        google.google_certs()
+        cache.delete(google.GOOGLE_CERTS_REFRESH_KEY)
+        for _ in range(5):
+            self.assertIsInstance(google.Google.validate(id_token(signer=OTHER_SIGNER)), str)
+        self.assertEqual(self.fetch_certs.call_count, 2)
+
+
+    def test_certs_max_age(self):
+        """Max age is read from Cache-Control, defaulting to GOOGLE_CERTS_DEFAULT_TTL"""
+        self.assertEqual(google.certs_max_age(
+            {'cache-control': 'public, max-age=19204, must-revalidate, no-transform'}), 19204)
+        with override_settings(GOOGLE_CERTS_DEFAULT_TTL=60):
+            self.assertEqual(google.certs_max_age({}), 60)
+
+
+
+@override_settings(GOOGLE_ID_TOKEN_CERTS=CERTS, GOOGLE_CLIENT_ID=CLIENT_ID)
+class TestGoogleSocialAuthView(TestSetUp):
+    """Test cases for google social auth view"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('social_auth:auth-google')
+
+
+    def test_google_login_creates_user(self):
+        """Valid ID token registers the user and returns their token"""
+        res = self.client.post(self.url, {'auth_token': id_token()}, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.data['token'])
+        user = User.objects.get(email='social@example.com')
+        self.assertEqual((user.auth_provider, user.email_verified), ('google', True))
+
+
+    def test_google_login_with_other_audience(self):
+        """ID token issued for another client is rejected"""
+        res = self.client.post(self.url, {'auth_token': id_token(aud='other-client')},
+                               format="json")
+        self.assertEqual(res.status_code, 401)
+
+
+    def test_google_login_with_invalid_token(self):
+        """Invalid ID token is rejected"""
+        res = self.client.post(self.url, {'auth_token': 'not a token'}, format="json")
+        self.assertEqual(res.status_code, 400)
+
+
+
+    def test_google_login_of_existing_user(self):
+        """Existing google user gets their token back without password hashing"""
+        first = self.client.post(self.url, {'auth_token': id_token()}, format="json")
+        token = id_token()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(self.url, {'auth_token': token}, format="json")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['token'], first.data['token'])
+        self.assertLessEqual(len(queries), 2)
+        self.assertFalse(User.objects.get(email='social@example.com').has_usable_password())
+
+
+    def test_google_login_of_email_user(self):
+        """User registered with email cannot login with google"""
+        User.objects.create_user(username='socialuser', email='social@example.com',
+                                 password='password')
+        res = self.client.post(self.url, {'auth_token': id_token()}, format="json")
+        self.assertEqual(res.status_code, 401)
+
+
+
+class TestGenerateUsername(TestSetUp):
+    """Test cases for generating unique usernames of social users"""
+
+    def create_users(self, *usernames):
+        """Create users with given usernames"""
+        User.objects.bulk_create([User(username=username, email=username+'@example.com')
+                                  for username in usernames])
+
+
+    def test_free_username(self):
+        """Name without spaces is used when no user has it"""
+        self.create_users('socialuser1', 'socialusers')
+        self.assertEqual(generate_username('Social User'), 'socialuser')
+
+
+    def test_taken_username_gets_smallest_free_number(self):
+        """Taken name gets the smallest number no user has, in one query"""
+        self.create_users('socialuser', 'SocialUser1', 'socialuser2', 'socialuser4',
+                          'socialuserx3')
+        with CaptureQueriesContext(connection) as queries:
+            username = generate_username('Social User')
+
+        self.assertEqual(username, 'socialuser3')
+        self.assertEqual(len(queries), 1)
@@ -0,0 +1,47 @@
+"""Module to define helpers shared by benchmark commands"""
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from django.db import transaction
+from accounts.models import User
+
+
+
+class Rollback(Exception):
+    """Raised inside rolled_back() to discard benchmark data"""
+
+
+@contextmanager
+def rolled_back():
+    """Run the block inside a transaction which is always rolled back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def create_bench_user(prefix='benchmark'):
+    """Create a throwaway user with a unique name for benchmark data"""
+    name = prefix + uuid.uuid4().hex[:12]
+    return User.objects.create_user(username=name, email=name+'@benchmark.local')
+
+
+def measure(func, repeat=1):
+    """Call func repeat times and return list of timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    """Return mean, median and p95 of timings as a printable string"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered)-1, int(len(ordered)*0.95))]
+    return 'mean {:.3f} ms, median {:.3f} ms, p95 {:.3f} ms'.format(
+        statistics.mean(ordered), statistics.median(ordered), p95)
@@ -1,8 +1,14 @@
 """Module to define utils"""
+import tempfile
 from rest_framework.test import APITestCase
 from django.urls import reverse
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import override_settings
 from faker import Faker
 from accounts.models import User
+from accounts.throttling import login_failure_keys
+from api.models import Task
 
 
 
@@ -12,6 +18,13 @@ class TestSetUp(APITestCase):
     def setUp(self):
         """Urls and data for testing"""
 
+        # attachments saved by tests are stored in a temporary MEDIA_ROOT
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
         # Accounts urls
         self.register_url = reverse('register')
         self.login_url = reverse('login')
@@ -26,6 +39,7 @@ class TestSetUp(APITestCase):
         self.overdue_tasks_report_url = reverse('overdue-tasks')
         self.max_date_report_url = reverse('max-date')
         self.count_opened_report_url = reverse('count-opened')
+        self.report_summary_url = reverse('report-summary')
         self.similar_tasks_url = reverse('similar-tasks')
 
         self.fake = Faker()
@@ -45,6 +59,9 @@ class TestSetUp(APITestCase):
         self.user_email = {'email': self.email
         }
 
+        # failed logins of earlier tests (same client IP) must not throttle this one
+        cache.delete_many(login_failure_keys('127.0.0.1', self.email).values())
+
         self.attachment = open('media_cdn/emumba logo.jpg', 'rb')
         self.task_data = {
                 'title': 'abc',
@@ -85,5 +102,28 @@ class TestSetUp(APITestCase):
         user.save()
         return user
 
+    def login(self):
+        """Create test user (as self.user), log it in and return its authorization header"""
+        self.user = self.create_test_user()
+        token = self.client.post(self.login_url, self.user_login_data,
+                                 format="json").data['token']
+        return {'HTTP_AUTHORIZATION':'token '+token}
+
     def tearDown(self):
         return super().tearDown()
+
+
+
+class AttachmentTestMixin:
+    """Test user and attachment storage for test cases of attachment files"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_test_user()
+        self.storage = Task._meta.get_field('attachment').storage
+
+
+    def create_task(self, title, content):
+        """Create task of test user with attachment content"""
+        return Task.objects.create(user=self.user, title=title, dueDate="2021-08-01 16:18:2",
+                                   attachment=SimpleUploadedFile('file.txt', content))